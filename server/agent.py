@@ -17,7 +17,7 @@ from contextlib import suppress
 # MEMORI INTEGRATION
 from memori_engine import MemoriEngine
 # PHASE 3: INTENT CLASSIFICATION & DYNAMIC PROMPTS
-from intent_classifier import IntentClassifier, IntentResult, IntentType, ThinkingLevel, Domain
+from intent_classifier import IntentClassifier, IntentResult, IntentType, ThinkingLevel, Domain, get_intent_classifier
 from dynamic_prompts import DynamicPromptManager
 from config import (
     ROUTE_CONFIDENCE_MIN,
@@ -127,7 +127,7 @@ class TutorAgent:
 
         self.intent_classifier: Optional[IntentClassifier] = None
         try:
-            self.intent_classifier = IntentClassifier(model_name=self.planner_model_name)
+            self.intent_classifier = get_intent_classifier(self.planner_model_name)
             logger.info("✅ Intent classifier ready")
         except Exception as exc:
             logger.warning("⚠️  Failed to initialize intent classifier: %s", exc)
@@ -472,7 +472,7 @@ class TutorAgent:
         if not item:
             return None
         ts, answer = item
-        if _time.time() - ts > self.cache_ttl_seconds:
+        if _time.monotonic() - ts > self.cache_ttl_seconds:
             self._answer_cache.pop(key, None)
             return None
         return answer
@@ -482,7 +482,7 @@ class TutorAgent:
             # simple eviction: remove oldest
             oldest_key = min(self._answer_cache.items(), key=lambda kv: kv[1][0])[0]
             self._answer_cache.pop(oldest_key, None)
-        self._answer_cache[key] = (_time.time(), answer)
+        self._answer_cache[key] = (_time.monotonic(), answer)
 
     @staticmethod
     def _route_from_intent(intent_result: Optional[IntentResult]) -> Optional[str]:
@@ -679,7 +679,7 @@ class TutorAgent:
         plan = state.get("plan") or self._extract_plan(state)
         query = self._parse_search_query(plan) or self._get_last_user_message(state)
         history_context = self._get_history_string(state)
-        tool_context = self._collect_tool_blocks(plan, query, history_context)
+        tool_context = await asyncio.to_thread(self._collect_tool_blocks, plan, query, history_context)
         if not tool_context:
             logger.info("ℹ️ No external tools required.")
             return {"messages": []}
@@ -687,7 +687,7 @@ class TutorAgent:
 
     async def _solve_node(self, state: AgentState) -> Dict[str, Any]:
         logger.info("🛠️ Stage 2: Specialist solving (graph mode)")
-        t0 = _time.time()
+        t0 = _time.perf_counter()
         route = state.get("route", "general")
         plan = state.get("plan", "")
         tool_context = state.get("tool_context", "")
@@ -704,7 +704,7 @@ class TutorAgent:
         cached = self._lookup_cache(cache_key)
         if cached and not use_verifier:
             logger.info("⚡ Cache hit for route=%s; skipping verify", route_for_solve)
-            t1 = _time.time()
+            t1 = _time.perf_counter()
             logger.info("⏱️ Solve stage (cached) took %.0f ms", (t1 - t0) * 1000)
             return {
                 "messages": [],
@@ -719,7 +719,7 @@ class TutorAgent:
         solution_text, specialist_model, response = await self._run_specialist_stage(
             route_for_solve, question, plan, history_text, tool_context
         )
-        t1 = _time.time()
+        t1 = _time.perf_counter()
         logger.info("⏱️ Solve stage took %.0f ms", (t1 - t0) * 1000)
         return {
             "messages": [response],
@@ -731,7 +731,7 @@ class TutorAgent:
 
     async def _verify_node(self, state: AgentState) -> Dict[str, Any]:
         logger.info("✅ Stage 3: Verification & finalization")
-        t0 = _time.time()
+        t0 = _time.perf_counter()
         route = state.get("route", "general")
         plan = state.get("plan", "")
         tool_context = state.get("tool_context", "")
@@ -742,7 +742,7 @@ class TutorAgent:
         if not use_verifier:
             # Pass through specialist output
             self._store_cache(self._cache_key(question, route if route in {"math", "code"} else "general"), specialist_output)
-            t1 = _time.time()
+            t1 = _time.perf_counter()
             logger.info("⏱️ Verify stage skipped; total %.0f ms", (t1 - t0) * 1000)
             return {
                 "messages": [],
@@ -760,7 +760,7 @@ class TutorAgent:
             None,
         )
         self._store_cache(self._cache_key(question, route if route in {"math", "code"} else "general"), final_answer)
-        t1 = _time.time()
+        t1 = _time.perf_counter()
         logger.info("⏱️ Verify stage took %.0f ms", (t1 - t0) * 1000)
         return {
             "messages": [response],
@@ -959,7 +959,7 @@ class TutorAgent:
             # CRITICAL FIX: Still collect memory context even in quick mode
             # This ensures continuations like "yes" can access previous context
             try:
-                tool_context = self._collect_tool_blocks(plan_for_specialist, query, history_text)
+                tool_context = await asyncio.to_thread(self._collect_tool_blocks, plan_for_specialist, query, history_text)
                 if tool_context:
                     plan_display = f"{plan_display}\n{tool_context}"
                     logger.info("✅ Retrieved memory context in quick mode")
@@ -998,7 +998,7 @@ class TutorAgent:
 
             plan_for_specialist = self._extract_tag_content(plan_raw, "THINK") or plan_raw.strip()
             route = self._determine_route(plan_raw, intent_result, query)
-            tool_context = self._collect_tool_blocks(plan_raw, query, history_text)
+            tool_context = await asyncio.to_thread(self._collect_tool_blocks, plan_raw, query, history_text)
             plan_display = plan_for_specialist
             if tool_context:
                 plan_display = f"{plan_display}\n{tool_context}"
@@ -1163,7 +1163,9 @@ class MCPClient:
     """Lightweight JSON-RPC stdio client for the local mcp_server."""
     def __init__(self, start: bool = False, timeout: float = 8.0):
         self.proc: subprocess.Popen | None = None
-        self.q: "queue.Queue[str]" = queue.Queue()
+        # Responses are routed to the waiting caller by JSON-RPC id, so calls
+        # from several threads can be in flight at once
+        self._pending: Dict[str, "queue.Queue[Dict[str, Any]]"] = {}
         self.lock = threading.Lock()
         self.timeout = timeout
         self.alive = False
@@ -1188,7 +1190,14 @@ class MCPClient:
         if not self.proc or not self.proc.stdout:
             return
         for line in self.proc.stdout:
-            self.q.put(line.rstrip("\n"))
+            try:
+                msg = json.loads(line)
+            except json.JSONDecodeError:
+                logger.debug(f"[MCP STDOUT] {line.rstrip()}")
+                continue
+            waiter = self._pending.get(msg.get("id")) if isinstance(msg, dict) else None
+            if waiter is not None:
+                waiter.put(msg)
         self.alive = False
 
     def _stderr_logger(self):
@@ -1205,45 +1214,39 @@ class MCPClient:
             self.proc.stdin.write(line + "\n")
             self.proc.stdin.flush()
 
+    def _request(self, method: str, params: Dict[str, Any] | None = None) -> Dict[str, Any] | None:
+        """Send a JSON-RPC request and wait for its response (None on timeout)"""
+        _id = str(uuid.uuid4())
+        req: Dict[str, Any] = {"jsonrpc": "2.0", "id": _id, "method": method}
+        if params is not None:
+            req["params"] = params
+        waiter: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=1)
+        self._pending[_id] = waiter
+        try:
+            self._send(req)
+            return waiter.get(timeout=self.timeout)
+        except queue.Empty:
+            return None
+        finally:
+            self._pending.pop(_id, None)
+
     def call_tool(self, name: str, arguments: Dict[str, Any] | None = None) -> Any:
         if not self.alive:
             raise RuntimeError("MCP server not alive")
-        _id = str(uuid.uuid4())
-        req = {"jsonrpc": "2.0", "id": _id, "method": "tools/call", "params": {"name": name, "arguments": arguments or {}}}
-        self._send(req)
-        deadline = _time.time() + self.timeout
-        buf: List[str] = []
-        while _time.time() < deadline:
-            try:
-                line = self.q.get(timeout=0.1)
-            except queue.Empty:
-                continue
-            buf.append(line)
-            with suppress(json.JSONDecodeError):
-                msg = json.loads(line)
-                if msg.get("id") == _id:
-                    if "result" in msg:
-                        return msg["result"]
-                    if "error" in msg:
-                        raise RuntimeError(msg["error"].get("message"))
-        raise TimeoutError(f"Timeout waiting for MCP tool '{name}' response. Buffer: {buf[-5:]}")
+        msg = self._request("tools/call", {"name": name, "arguments": arguments or {}})
+        if msg is None:
+            raise TimeoutError(f"Timeout waiting for MCP tool '{name}' response")
+        if "error" in msg:
+            raise RuntimeError(msg["error"].get("message"))
+        return msg.get("result")
 
     def list_tools(self) -> List[Dict[str, Any]]:
         if not self.alive:
             raise RuntimeError("MCP server not alive")
-        _id = str(uuid.uuid4())
-        self._send({"jsonrpc": "2.0", "id": _id, "method": "tools/list"})
-        deadline = _time.time() + self.timeout
-        while _time.time() < deadline:
-            try:
-                line = self.q.get(timeout=0.1)
-            except queue.Empty:
-                continue
-            with suppress(json.JSONDecodeError):
-                msg = json.loads(line)
-                if msg.get("id") == _id and "result" in msg:
-                    return msg["result"].get("tools", [])
-        raise TimeoutError("Timeout listing tools")
+        msg = self._request("tools/list")
+        if msg is None or "result" not in msg:
+            raise TimeoutError("Timeout listing tools")
+        return msg["result"].get("tools", [])
 
     def close(self):  # optional
         if self.proc and self.alive:
@@ -9,8 +9,13 @@ in `config.py`.
 """
 from __future__ import annotations
 
-from typing import Dict
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
 
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
@@ -19,6 +24,46 @@ from config import verify_supabase_jwt
 
 _http_bearer = HTTPBearer(auto_error=False)
 
+# FastAPI already resolves the dependency once per request; this cache also
+# skips re-verifying the same token across requests. Entries never outlive
+# the token's own `exp` claim. get_current_user is a sync dependency, so it
+# runs on FastAPI's threadpool and every access goes through the lock.
+_TOKEN_CACHE_TTL = 60.0
+_TOKEN_CACHE_SIZE = 10000
+_token_cache: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2s(token.encode(), digest_size=16).digest()
+
+
+def _cache_token(key: bytes, token: str, user_id: str) -> None:
+    expires_at = time.time() + _TOKEN_CACHE_TTL
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+    except Exception:
+        return
+    with _token_cache_lock:
+        _token_cache[key] = (expires_at, user_id)
+        if len(_token_cache) > _TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+
+def _cached_user_id(key: bytes) -> str | None:
+    """User id for a token verified recently, refreshing its LRU position"""
+    with _token_cache_lock:
+        cached = _token_cache.get(key)
+        if cached is None:
+            return None
+        if time.time() >= cached[0]:
+            del _token_cache[key]
+            return None
+        _token_cache.move_to_end(key)
+        return cached[1]
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(_http_bearer),
@@ -32,14 +77,19 @@ def get_current_user(
     if not credentials or not credentials.credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing Authorization header")
 
-    ok, user_id, err = verify_supabase_jwt(credentials.credentials)
-    if not ok or not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=err or "Invalid token")
+    token = credentials.credentials
+    key = _token_key(token)
+    user_id = _cached_user_id(key)
+    if user_id is None:
+        ok, user_id, err = verify_supabase_jwt(token)
+        if not ok or not user_id:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=err or "Invalid token")
+        _cache_token(key, token, user_id)
 
     # Return a backward-compatible shape: include both 'user_id' and 'id'
     # Some existing routers reference user['id'] while new code uses user['user_id'].
     # Keeping both avoids breaking existing endpoints during migration.
-    return {"user_id": user_id, "id": user_id, "token": credentials.credentials}
+    return {"user_id": user_id, "id": user_id, "token": token}
 
 
 __all__ = ["get_current_user"]
@@ -0,0 +1,77 @@
+"""
+Topic Prerequisite Checker
+Validates that topic prerequisites form a DAG. A cycle leaves every topic on
+it locked forever, since each waits for another to be completed first.
+
+Run after topics or their prerequisites change.
+"""
+
+import sys
+from collections import deque
+from typing import Dict, List
+
+from config import get_supabase_client
+
+
+def topological_order(prereqs: Dict[str, List[str]]) -> List[str]:
+    """Order topics so every prerequisite precedes its dependants (Kahn's algorithm)
+
+    Prerequisite ids that are not themselves topics are ignored. Raises
+    ValueError naming the topics involved if the prerequisites contain a cycle.
+    """
+    dependants: Dict[str, List[str]] = {topic_id: [] for topic_id in prereqs}
+    in_degree = {topic_id: 0 for topic_id in prereqs}
+    for topic_id, parents in prereqs.items():
+        for parent in set(parents):
+            if parent in dependants:
+                dependants[parent].append(topic_id)
+                in_degree[topic_id] += 1
+
+    queue = deque(topic_id for topic_id, degree in in_degree.items() if degree == 0)
+    order = []
+    while queue:
+        topic_id = queue.popleft()
+        order.append(topic_id)
+        for child in dependants[topic_id]:
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                queue.append(child)
+
+    if len(order) < len(prereqs):
+        cyclic = sorted(topic_id for topic_id, degree in in_degree.items() if degree > 0)
+        raise ValueError(f"Topic prerequisites contain a cycle involving: {cyclic}")
+    return order
+
+
+def unknown_prerequisites(prereqs: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Prerequisite ids that are not topics, per topic; they can never be completed"""
+    return {
+        topic_id: missing
+        for topic_id, parents in prereqs.items()
+        if (missing := sorted(set(parents) - prereqs.keys()))
+    }
+
+
+def check_topic_prerequisites(supabase) -> int:
+    """Load all topics and validate their prerequisites. Returns the topic count."""
+    topics = supabase.table('topics').select('id, prerequisites').execute()
+    prereqs = {row['id']: row.get('prerequisites') or [] for row in topics.data}
+    for topic_id, missing in unknown_prerequisites(prereqs).items():
+        print(f"⚠️  Topic {topic_id} requires unknown topics {missing} and stays locked")
+    topological_order(prereqs)
+    return len(prereqs)
+
+
+if __name__ == "__main__":
+    supabase = get_supabase_client()
+    if not supabase:
+        print("❌ SUPABASE_URL and SUPABASE_KEY must be set")
+        sys.exit(1)
+
+    try:
+        count = check_topic_prerequisites(supabase)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"✅ Prerequisites of {count} topics form a DAG")
@@ -16,6 +16,11 @@ from dotenv import load_dotenv
 
 # Third‑party clients
 from supabase import create_client, Client as SupabaseClient
+try:
+	from supabase import acreate_client, AsyncClient as AsyncSupabaseClient
+except ImportError:  # older supabase-py without the async API
+	acreate_client = None
+	AsyncSupabaseClient = None
 import jwt
 from jwt import InvalidTokenError
 
@@ -31,6 +36,9 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
 # can verify signatures for anon role only. Prefer the service_role key for backend
 # database operations (never expose to frontend!).
 SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
+# Direct Postgres connection string (optional). When set, chat message writes
+# bypass PostgREST through an asyncpg pool; use the pooler URL on Supabase.
+DATABASE_URL = os.getenv("DATABASE_URL", "")
 
 if not SUPABASE_URL or not SUPABASE_KEY:
 	logger.warning("Supabase URL/KEY not set. Database features will be disabled until configured.")
@@ -106,6 +114,26 @@ def get_supabase_client() -> Optional[SupabaseClient]:
 # Lazily initialized client; modules can import `supabase` from here
 supabase: Optional[SupabaseClient] = get_supabase_client()
 
+_async_supabase: Optional["AsyncSupabaseClient"] = None
+
+
+async def get_async_supabase_client() -> Optional["AsyncSupabaseClient"]:
+	"""Return a shared async Supabase client, created on first use.
+
+	Queries built from it are awaited directly on the event loop instead of
+	occupying a worker thread. Returns None when Supabase is not configured
+	or the installed supabase-py has no async API; callers then fall back to
+	the sync client.
+	"""
+	global _async_supabase
+	if _async_supabase is None and acreate_client is not None and SUPABASE_URL and SUPABASE_KEY:
+		try:
+			_async_supabase = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+		except Exception as e:
+			logger.error(f"Failed to create async Supabase client: {e}")
+			return None
+	return _async_supabase
+
 
 def verify_supabase_jwt(token: str) -> Tuple[bool, Optional[str], Optional[str]]:
 	"""Verify a Supabase JWT and return (ok, user_id, error).
@@ -155,6 +183,7 @@ def verify_supabase_jwt(token: str) -> Tuple[bool, Optional[str], Optional[str]]
 __all__ = [
 	"supabase",
 	"get_supabase_client",
+	"get_async_supabase_client",
 	"verify_supabase_jwt",
 	"SUPABASE_URL",
 	"SUPABASE_KEY",
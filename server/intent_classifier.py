@@ -16,6 +16,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import re
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
 from enum import Enum
 from dataclasses import dataclass
@@ -524,6 +525,12 @@ REASON: [brief explanation]"""
 # HELPER FUNCTIONS
 # ============================================================================
 
+@lru_cache(maxsize=4)
+def get_intent_classifier(model_name: str = "qwen2.5:3b-instruct-q5_K_M") -> IntentClassifier:
+    """Shared IntentClassifier (and its ChatOllama client) per model"""
+    return IntentClassifier(model_name=model_name)
+
+
 async def classify_user_intent(
     query: str,
     conversation_history: Optional[List[Dict[str, str]]] = None,
@@ -540,5 +547,5 @@ async def classify_user_intent(
     Returns:
         IntentResult with classification
     """
-    classifier = IntentClassifier(model_name=model_name)
+    classifier = get_intent_classifier(model_name)
     return await classifier.classify(query, conversation_history)
@@ -12,11 +12,16 @@ from pydantic import BaseModel
 import json
 import uuid
 
+try:
+    import orjson  # optional: faster serialization for SSE frames
+except ImportError:
+    orjson = None
+
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from agent import TutorAgent
 from auth import get_current_user
 from rate_limit import limit_user
-from config import supabase, get_supabase_client, CORS_ALLOW_ORIGINS
+from config import supabase, get_supabase_client, CORS_ALLOW_ORIGINS, DATABASE_URL
 from session_manager import SessionManager
 # Updated to use Memori engine instead of embedding_engine
 from memori_engine import initialize_memori_engine, get_memori_engine, store_user_memory
@@ -42,6 +47,16 @@ logger = logging.getLogger("FastAPI")
 # --- Global Agent Instance ---
 tutor_agent: Optional[TutorAgent] = None
 
+def _sse_data(payload: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events data frame"""
+    if orjson is not None:
+        return f"data: {orjson.dumps(payload).decode()}\n\n"
+    return f"data: {json.dumps(payload)}\n\n"
+
+# --- Shared Session Manager ---
+# One instance so concurrent requests' message saves coalesce into bulk inserts
+session_mgr: Optional[SessionManager] = SessionManager(supabase) if supabase else None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle - initialize agent on startup"""
@@ -64,9 +79,15 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Failed to initialize TutorAgent: {e}")
         tutor_agent = None
 
+    # Direct Postgres pool for chat message writes (optional)
+    if session_mgr and DATABASE_URL:
+        await session_mgr.connect_pool(DATABASE_URL)
+
     yield
 
     logger.info("🛑 Shutting down FastAPI server...")
+    if session_mgr:
+        await session_mgr.close_pool()
 
 # --- FastAPI App ---
 app = FastAPI(
@@ -213,9 +234,6 @@ async def chat_endpoint(request: ChatRequest, user=Depends(get_current_user)):
         session_id = None
         user_message_id = None
         
-        # Initialize Session Manager
-        session_mgr = SessionManager(supabase)
-        
         try:
             # Priority 1: Use session_id if provided (for continuing existing sessions)
             if request.session_id:
@@ -243,7 +261,7 @@ async def chat_endpoint(request: ChatRequest, user=Depends(get_current_user)):
                 roadmap_id = request.metadata.get("roadmap_id") if hasattr(request, "metadata") and request.metadata else None
                 topic_id = request.metadata.get("topic_id") if hasattr(request, "metadata") and request.metadata else None
                 
-                session = session_mgr.get_or_create_session(
+                session = await session_mgr.get_or_create_session(
                     user_id=user["user_id"],
                     conversation_id=conversation_id,
                     roadmap_id=roadmap_id,
@@ -258,7 +276,7 @@ async def chat_endpoint(request: ChatRequest, user=Depends(get_current_user)):
             
             # Save user message immediately with retry logic
             try:
-                user_msg = session_mgr.save_message(
+                user_msg = await session_mgr.save_message(
                     session_id=session_id,
                     role="user",
                     content=request.message,
@@ -308,7 +326,7 @@ async def chat_endpoint(request: ChatRequest, user=Depends(get_current_user)):
                     
                     # Save roadmap trigger as separate message
                     try:
-                        session_mgr.save_message(
+                        await session_mgr.save_message(
                             session_id=session_id,
                             role="system",
                             content=f"Roadmap generated: {trigger_meta.get('topic', 'Learning Path')}",
@@ -319,7 +337,7 @@ async def chat_endpoint(request: ChatRequest, user=Depends(get_current_user)):
                         
                         # Link roadmap to session if roadmap_id provided
                         if trigger_meta.get("roadmap_id"):
-                            session_mgr.link_roadmap_to_session(session_id, trigger_meta["roadmap_id"])
+                            await session_mgr.link_roadmap_to_session(session_id, trigger_meta["roadmap_id"])
                     except Exception as e:
                         logger.error(f"❌ Failed to save roadmap trigger: {e}")
                         
@@ -329,7 +347,7 @@ async def chat_endpoint(request: ChatRequest, user=Depends(get_current_user)):
                     
                     # Save quiz trigger
                     try:
-                        session_mgr.save_message(
+                        await session_mgr.save_message(
                             session_id=session_id,
                             role="system",
                             content=f"Quiz generated: {quiz_meta.get('title', 'Practice Quiz')}",
@@ -345,7 +363,7 @@ async def chat_endpoint(request: ChatRequest, user=Depends(get_current_user)):
                     
                     # Save complete assistant message with thinking
                     try:
-                        assistant_msg = session_mgr.save_message(
+                        assistant_msg = await session_mgr.save_message(
                             session_id=session_id,
                             role="assistant",
                             content=answer_buffer,
@@ -365,7 +383,7 @@ async def chat_endpoint(request: ChatRequest, user=Depends(get_current_user)):
                     "timestamp": str(asyncio.get_event_loop().time())
                 }
                 payload = {**base, **evt}
-                yield f"data: {json.dumps(payload)}\n\n"
+                yield _sse_data(payload)
                 
         except Exception as e:
             logger.exception("❌ Streaming error")
@@ -378,7 +396,7 @@ async def chat_endpoint(request: ChatRequest, user=Depends(get_current_user)):
                 "session_id": session_id,
                 "timestamp": str(asyncio.get_event_loop().time())
             }
-            yield f"data: {json.dumps(err_payload)}\n\n"
+            yield _sse_data(err_payload)
 
     return StreamingResponse(event_stream(), media_type="text/event-stream", headers={
         "Cache-Control": "no-cache",
@@ -692,8 +710,6 @@ async def get_chat_history(
         if not supabase:
             return {"messages": []}
         
-        session_mgr = SessionManager(supabase)
-        
         # Get all sessions for user (most recent first)
         sessions_query = supabase.table("chat_sessions")\
             .select("id, conversation_id, title, created_at, ended_at, roadmap_id")\
@@ -927,7 +943,7 @@ async def chat_events(
                             "session_id": resolved_session_id,
                             "data": row,
                         }
-                        yield f"data: {json.dumps(payload)}\n\n"
+                        yield _sse_data(payload)
                 except Exception:
                     logger.debug("Polling chat_messages failed", exc_info=True)
 
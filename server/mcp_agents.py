@@ -10,6 +10,7 @@ Provides specialized agents for different teaching tasks:
 import logging
 import re
 import io
+from functools import cached_property
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
@@ -279,11 +280,19 @@ class VectorAgent:
     """Agent for embeddings and semantic search"""
     
     def __init__(self):
-        # Use Ollama's embeddinggemma model for embeddings
-        self.embeddings = OllamaEmbeddings(model="embeddinggemma")
-        self.supabase = get_supabase_client()
+        # Clients are built on first use (see below) so importing this module
+        # for the singleton stays cheap
         logger.info("✅ VectorAgent initialized with Ollama embeddinggemma")
     
+    @cached_property
+    def embeddings(self) -> OllamaEmbeddings:
+        # Use Ollama's embeddinggemma model for embeddings
+        return OllamaEmbeddings(model="embeddinggemma")
+    
+    @cached_property
+    def supabase(self):
+        return get_supabase_client()
+    
     def create_embedding(self, text: str) -> List[float]:
         """Create embedding vector for text using Ollama"""
         try:
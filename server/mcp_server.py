@@ -18,7 +18,9 @@ from __future__ import annotations
 import sys
 import json
 import time
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict
 import urllib.request
@@ -293,9 +295,17 @@ TOOL_DEFS = {
 }
 
 
+# Requests are handled on a thread pool so a slow tool (web search, a model
+# call) doesn't hold up the others; responses carry their request id
+_MAX_WORKERS = 8
+_write_lock = threading.Lock()
+
+
 def _write(message: Dict[str, Any]) -> None:
-    sys.stdout.write(json.dumps(message) + "\n")
-    sys.stdout.flush()
+    line = json.dumps(message) + "\n"
+    with _write_lock:
+        sys.stdout.write(line)
+        sys.stdout.flush()
 
 
 def handle_request(req: Dict[str, Any]) -> None:
@@ -386,20 +396,21 @@ def handle_request(req: Dict[str, Any]) -> None:
 def main() -> None:
     # Optionally send a ready notification (non-standard but useful for dev)
     _write({"jsonrpc": "2.0", "method": "status", "params": {"status": "ready"}})
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            req = json.loads(line)
-        except json.JSONDecodeError:
-            _write({
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {"code": -32700, "message": "Parse error"},
-            })
-            continue
-        handle_request(req)
+    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                req = json.loads(line)
+            except json.JSONDecodeError:
+                _write({
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {"code": -32700, "message": "Parse error"},
+                })
+                continue
+            pool.submit(handle_request, req)
 
 
 if __name__ == "__main__":  # pragma: no cover
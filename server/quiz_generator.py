@@ -136,7 +136,8 @@ Return a JSON object:
             model="gemma3:4b",
             temperature=0.7,
             num_predict=4096,  # Increased for quiz JSON generation
-            timeout=120  # 2 minute timeout for quiz generation
+            timeout=120,  # 2 minute timeout for quiz generation
+            format="json"  # Grammar-constrained decoding: response is always a JSON object
         )
         logger.info("QuizGeneratorAgent initialized with gemma3:4b Ollama model")
 
@@ -178,7 +179,7 @@ Return a JSON object:
 
             messages = [
                 SystemMessage(content=prompt),
-                HumanMessage(content=f"Generate a {difficulty} quiz with exactly {num_questions} questions about: {', '.join(topics)}. Return ONLY valid JSON, no other text.")
+                HumanMessage(content=f"Generate a {difficulty} quiz with exactly {num_questions} questions about: {', '.join(topics)}.")
             ]
 
             # Generate quiz
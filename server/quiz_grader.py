@@ -91,7 +91,8 @@ Return JSON:
         self.llm = ChatOllama(
             model="gemma3:4b",  # Using verification model for consistent, accurate grading
             temperature=0.1,  # Lower temperature for more consistent grading
-            num_predict=2048
+            num_predict=2048,
+            format="json"  # Grammar-constrained decoding: response is always a JSON object
         )
         logger.info("QuizGraderAgent initialized with local Ollama verification model (gemma3:4b)")
 
@@ -31,7 +31,7 @@ class FixedWindowLimiter:
         self.buckets: Dict[str, Deque[float]] = defaultdict(deque)
 
     def check(self, key: str) -> None:
-        now = time.time()
+        now = time.monotonic()
         q = self.buckets[key]
         # drop old entries
         while q and now - q[0] > self.window:
@@ -13,6 +13,11 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
+def _compact_json(data: Any) -> str:
+    """Compact JSON for prompts: no indentation or \\u escapes, so fewer tokens"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
 class RoadmapGeneratorAgent:
     """
     AI agent that generates personalized learning roadmaps
@@ -114,7 +119,8 @@ Return the UPDATED roadmap in the same JSON format as before.
         self.llm = ChatOllama(
             model="qwen2.5:3b-instruct-q5_K_M",
             temperature=0.7,
-            num_predict=4096
+            num_predict=4096,
+            format="json"  # Grammar-constrained decoding: response is always a JSON object
         )
         logger.info("RoadmapGeneratorAgent initialized with local Ollama model")
 
@@ -145,7 +151,7 @@ Return the UPDATED roadmap in the same JSON format as before.
 
             # Create the prompt
             prompt = self.ROADMAP_GENERATION_PROMPT.format(
-                user_context=json.dumps(user_context, indent=2),
+                user_context=_compact_json(user_context),
                 conversation_history=formatted_history,
                 user_goal=user_goal,
                 domain=domain
@@ -194,8 +200,8 @@ Return the UPDATED roadmap in the same JSON format as before.
             logger.info("Adapting roadmap based on performance...")
 
             prompt = self.ROADMAP_ADAPTATION_PROMPT.format(
-                current_roadmap=json.dumps(current_roadmap, indent=2),
-                performance_data=json.dumps(performance_data, indent=2),
+                current_roadmap=_compact_json(current_roadmap),
+                performance_data=_compact_json(performance_data),
                 struggles=", ".join(user_struggles),
                 strengths=", ".join(user_strengths)
             )
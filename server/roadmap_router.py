@@ -7,11 +7,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+import asyncio
 import logging
 import uuid
 
 from auth import get_current_user
 from rate_limit import limit_user
+from supabase import Client
 from config import get_supabase_client
 from roadmap_agent import RoadmapGeneratorAgent
 
@@ -21,6 +23,25 @@ router = APIRouter(prefix="/api/roadmaps", tags=["roadmaps"])
 # Initialize the roadmap generator
 roadmap_generator = RoadmapGeneratorAgent()
 
+# Supabase client shared by every handler (created on first use)
+_SB: Optional[Client] = None
+
+
+def _sb() -> Optional[Client]:
+    """Return the module's Supabase client, creating it once"""
+    global _SB
+    if _SB is None:
+        _SB = get_supabase_client()
+    return _SB
+
+# Chat progress event text (see _emit_progress_chat_event)
+_STATUS_TEXT = {
+    "not_started": "set to not started",
+    "in_progress": "marked in progress",
+    "completed": "marked completed",
+}
+_CONTENT_TMPL = "Progress update: Milestone `{mid}` {st}. Roadmap `{title}` progress: {pct}%."
+
 
 # ============================================================================
 # REQUEST/RESPONSE MODELS
@@ -85,7 +106,7 @@ async def generate_roadmap(
             raise HTTPException(status_code=401, detail="User not authenticated")
         limit_user(user_id)
 
-        supabase = get_supabase_client()
+        supabase = _sb()
 
         # Get conversation_id from request (directly passed or from user_context)
         conversation_id = request.conversation_id
@@ -95,20 +116,22 @@ async def generate_roadmap(
         # If a roadmap already exists for this user + conversation, return it (idempotent)
         if conversation_id:
             try:
-                existing_q = supabase.table("learning_roadmaps").select("*") \
-                    .eq("user_id", user_id) \
-                    .eq("conversation_id", conversation_id) \
-                    .not_.eq("status", "abandoned") \
-                    .order("created_at", desc=True) \
-                    .limit(1) \
-                    .execute()
+                existing_q = await _sb_exec(
+                    supabase.table("learning_roadmaps").select("*")
+                    .eq("user_id", user_id)
+                    .eq("conversation_id", conversation_id)
+                    .not_.eq("status", "abandoned")
+                    .order("created_at", desc=True)
+                    .limit(1)
+                )
                 if existing_q.data:
                     existing = existing_q.data[0]
                     # Load milestone progress to enrich
-                    progress_result = supabase.table("milestone_progress") \
-                        .select("*") \
-                        .eq("roadmap_id", existing["id"]) \
-                        .execute()
+                    progress_result = await _sb_exec(
+                        supabase.table("milestone_progress")
+                        .select("*")
+                        .eq("roadmap_id", existing["id"])
+                    )
                     milestone_progress = {mp["milestone_id"]: mp for mp in progress_result.data}
                     enriched = _enrich_roadmap_with_progress(existing, milestone_progress)
                     logger.info(f"Idempotent return of existing roadmap {existing['id']} for conversation {conversation_id}")
@@ -138,7 +161,7 @@ async def generate_roadmap(
         # Verify chat_session_id exists; if not, try to find/create one via conversation_id
         if chat_session_id:
             try:
-                chat_check = supabase.table("chat_sessions").select("id").eq("id", chat_session_id).single().execute()
+                chat_check = await _sb_exec(supabase.table("chat_sessions").select("id").eq("id", chat_session_id).single())
                 if not chat_check.data:
                     logger.warning(f"chat_session_id '{chat_session_id}' not found; attempting lookup by conversation_id")
                     chat_session_id = None
@@ -150,9 +173,11 @@ async def generate_roadmap(
         # Fallback: Try to find session by conversation_id
         if not chat_session_id and conversation_id:
             try:
-                session_lookup = supabase.table("chat_sessions").select("id").eq(
-                    "conversation_id", conversation_id
-                ).eq("user_id", user_id).order("created_at", desc=True).limit(1).execute()
+                session_lookup = await _sb_exec(
+                    supabase.table("chat_sessions").select("id").eq(
+                        "conversation_id", conversation_id
+                    ).eq("user_id", user_id).order("created_at", desc=True).limit(1)
+                )
                 if session_lookup.data:
                     chat_session_id = session_lookup.data[0]["id"]
                     logger.info(f"Found chat_session_id '{chat_session_id}' via conversation_id lookup")
@@ -176,7 +201,7 @@ async def generate_roadmap(
             "metadata": {"user_goal": request.user_goal}
         }
 
-        result = supabase.table("learning_roadmaps").insert(roadmap_record).execute()
+        result = await _sb_exec(supabase.table("learning_roadmaps").insert(roadmap_record))
 
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create roadmap")
@@ -184,7 +209,7 @@ async def generate_roadmap(
         created_roadmap = result.data[0]
 
         # Create initial milestone progress records
-        await _initialize_milestone_progress(user_id, created_roadmap["id"], roadmap_data)
+        await _initialize_milestone_progress(user_id, created_roadmap["id"])
 
         logger.info(f"Roadmap created successfully: {created_roadmap['id']}")
 
@@ -216,7 +241,7 @@ async def get_user_roadmaps(
         if not user_id:
             raise HTTPException(status_code=401, detail="User not authenticated")
 
-        supabase = get_supabase_client()
+        supabase = _sb()
 
         # Build query
         query = supabase.table("learning_roadmaps").select("*").eq("user_id", user_id)
@@ -229,7 +254,7 @@ async def get_user_roadmaps(
 
         query = query.order("created_at", desc=True).limit(limit)
 
-        result = query.execute()
+        result = await _sb_exec(query)
 
         return {
             "roadmaps": result.data,
@@ -258,14 +283,15 @@ async def get_roadmap(
         if not user_id:
             raise HTTPException(status_code=401, detail="User not authenticated")
 
-        supabase = get_supabase_client()
+        supabase = _sb()
 
         # Get roadmap
-        roadmap_result = supabase.table("learning_roadmaps")\
-            .select("*")\
-            .eq("id", roadmap_id)\
-            .eq("user_id", user_id)\
-            .execute()
+        roadmap_result = await _sb_exec(
+            supabase.table("learning_roadmaps")
+            .select("*")
+            .eq("id", roadmap_id)
+            .eq("user_id", user_id)
+        )
 
         if not roadmap_result.data:
             raise HTTPException(status_code=404, detail="Roadmap not found")
@@ -273,10 +299,11 @@ async def get_roadmap(
         roadmap = roadmap_result.data[0]
 
         # Get milestone progress
-        progress_result = supabase.table("milestone_progress")\
-            .select("*")\
-            .eq("roadmap_id", roadmap_id)\
-            .execute()
+        progress_result = await _sb_exec(
+            supabase.table("milestone_progress")
+            .select("*")
+            .eq("roadmap_id", roadmap_id)
+        )
 
         milestone_progress = {mp["milestone_id"]: mp for mp in progress_result.data}
 
@@ -313,7 +340,7 @@ async def update_milestone_progress(
         if not user_id:
             raise HTTPException(status_code=401, detail="User not authenticated")
 
-        supabase = get_supabase_client()
+        supabase = _sb()
 
         # Update or create milestone progress
         update_data = {
@@ -334,9 +361,10 @@ async def update_milestone_progress(
             update_data["progress_percentage"] = 100.0
 
         # Upsert milestone progress
-        result = supabase.table("milestone_progress")\
-            .upsert(update_data, on_conflict="user_id,roadmap_id,phase_id,milestone_id")\
-            .execute()
+        result = await _sb_exec(
+            supabase.table("milestone_progress")
+            .upsert(update_data, on_conflict="user_id,roadmap_id,phase_id,milestone_id")
+        )
 
         # Recalculate overall roadmap progress
         await _recalculate_roadmap_progress(roadmap_id)
@@ -346,7 +374,9 @@ async def update_milestone_progress(
         if request.status == "completed":
             # Unlock the next milestone
             await _unlock_next_milestone(user_id, roadmap_id, phase_id, milestone_id)
-            quiz_trigger = await _check_quiz_triggers(user_id, roadmap_id, phase_id, milestone_id)
+            # The upserted progress row usually carries the milestone type already
+            milestone_type = result.data[0].get("milestone_type") if result.data else None
+            quiz_trigger = await _check_quiz_triggers(user_id, roadmap_id, phase_id, milestone_id, milestone_type)
 
         response = {
             "status": "success",
@@ -401,14 +431,15 @@ async def start_learning_milestone(
         if not user_id:
             raise HTTPException(status_code=401, detail="User not authenticated")
 
-        supabase = get_supabase_client()
+        supabase = _sb()
 
         # Get roadmap details
-        roadmap_result = supabase.table("learning_roadmaps")\
-            .select("*")\
-            .eq("id", roadmap_id)\
-            .eq("user_id", user_id)\
-            .execute()
+        roadmap_result = await _sb_exec(
+            supabase.table("learning_roadmaps")
+            .select("*")
+            .eq("id", roadmap_id)
+            .eq("user_id", user_id)
+        )
 
         if not roadmap_result.data:
             raise HTTPException(status_code=404, detail="Roadmap not found")
@@ -526,14 +557,15 @@ async def start_learning_milestone(
         
         if conversation_id:
             # Roadmap was created from a chat - find or create session with that conversation_id
-            session_result = supabase.table("chat_sessions")\
-                .select("*")\
-                .eq("conversation_id", conversation_id)\
-                .eq("user_id", user_id)\
-                .is_("ended_at", "null")\
-                .order("created_at", desc=True)\
-                .limit(1)\
-                .execute()
+            session_result = await _sb_exec(
+                supabase.table("chat_sessions")
+                .select("*")
+                .eq("conversation_id", conversation_id)
+                .eq("user_id", user_id)
+                .is_("ended_at", "null")
+                .order("created_at", desc=True)
+                .limit(1)
+            )
             
             if session_result.data:
                 session = session_result.data[0]
@@ -541,16 +573,18 @@ async def start_learning_milestone(
                 logger.info(f"Using existing session {session_id} with conversation_id {conversation_id}")
             else:
                 # Session doesn't exist for this conversation_id - create it
-                new_session = supabase.table("chat_sessions").insert({
-                    "user_id": user_id,
-                    "roadmap_id": roadmap_id,
-                    "conversation_id": conversation_id,
-                    "title": f"Learning: {roadmap_title}",
-                    "metadata": {
-                        "roadmap_title": roadmap_title,
-                        "started_from_milestone": milestone_id
-                    }
-                }).execute()
+                new_session = await _sb_exec(
+                    supabase.table("chat_sessions").insert({
+                        "user_id": user_id,
+                        "roadmap_id": roadmap_id,
+                        "conversation_id": conversation_id,
+                        "title": f"Learning: {roadmap_title}",
+                        "metadata": {
+                            "roadmap_title": roadmap_title,
+                            "started_from_milestone": milestone_id
+                        }
+                    })
+                )
 
                 if new_session.data:
                     session = new_session.data[0]
@@ -558,14 +592,15 @@ async def start_learning_milestone(
                     logger.info(f"Created new session {session_id} for existing conversation {conversation_id}")
         else:
             # No conversation_id - look for existing session by roadmap_id or create new
-            session_result = supabase.table("chat_sessions")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .eq("roadmap_id", roadmap_id)\
-                .is_("ended_at", "null")\
-                .order("created_at", desc=True)\
-                .limit(1)\
-                .execute()
+            session_result = await _sb_exec(
+                supabase.table("chat_sessions")
+                .select("*")
+                .eq("user_id", user_id)
+                .eq("roadmap_id", roadmap_id)
+                .is_("ended_at", "null")
+                .order("created_at", desc=True)
+                .limit(1)
+            )
 
             if session_result.data:
                 session = session_result.data[0]
@@ -575,16 +610,18 @@ async def start_learning_milestone(
             else:
                 # Create completely new session
                 conversation_id = str(uuid.uuid4())
-                new_session = supabase.table("chat_sessions").insert({
-                    "user_id": user_id,
-                    "roadmap_id": roadmap_id,
-                    "conversation_id": conversation_id,
-                    "title": f"Learning: {roadmap_title}",
-                    "metadata": {
-                        "roadmap_title": roadmap_title,
-                        "started_from_milestone": milestone_id
-                    }
-                }).execute()
+                new_session = await _sb_exec(
+                    supabase.table("chat_sessions").insert({
+                        "user_id": user_id,
+                        "roadmap_id": roadmap_id,
+                        "conversation_id": conversation_id,
+                        "title": f"Learning: {roadmap_title}",
+                        "metadata": {
+                            "roadmap_title": roadmap_title,
+                            "started_from_milestone": milestone_id
+                        }
+                    })
+                )
 
                 if new_session.data:
                     session = new_session.data[0]
@@ -596,23 +633,27 @@ async def start_learning_milestone(
 
         # Update milestone status to in_progress
         try:
-            supabase.table("milestone_progress").upsert({
-                "user_id": user_id,
-                "roadmap_id": roadmap_id,
-                "phase_id": phase_id,
-                "milestone_id": milestone_id,
-                "milestone_title": milestone_title,
-                "milestone_type": milestone_type,
-                "status": "in_progress",
-                "started_at": datetime.now().isoformat(),
-                "progress_percentage": 0.0
-            }, on_conflict="user_id,roadmap_id,phase_id,milestone_id").execute()
+            await _sb_exec(
+                supabase.table("milestone_progress").upsert({
+                    "user_id": user_id,
+                    "roadmap_id": roadmap_id,
+                    "phase_id": phase_id,
+                    "milestone_id": milestone_id,
+                    "milestone_title": milestone_title,
+                    "milestone_type": milestone_type,
+                    "status": "in_progress",
+                    "started_at": datetime.now().isoformat(),
+                    "progress_percentage": 0.0
+                }, on_conflict="user_id,roadmap_id,phase_id,milestone_id")
+            )
             
             # Update roadmap's current milestone
-            supabase.table("learning_roadmaps").update({
-                "current_phase_id": phase_id,
-                "current_milestone_id": milestone_id
-            }).eq("id", roadmap_id).execute()
+            await _sb_exec(
+                supabase.table("learning_roadmaps").update({
+                    "current_phase_id": phase_id,
+                    "current_milestone_id": milestone_id
+                }).eq("id", roadmap_id)
+            )
             
         except Exception as e:
             logger.warning(f"Failed to update milestone status: {e}")
@@ -657,14 +698,15 @@ async def adapt_roadmap(
         if not user_id:
             raise HTTPException(status_code=401, detail="User not authenticated")
 
-        supabase = get_supabase_client()
+        supabase = _sb()
 
         # Get current roadmap
-        roadmap_result = supabase.table("learning_roadmaps")\
-            .select("*")\
-            .eq("id", roadmap_id)\
-            .eq("user_id", user_id)\
-            .execute()
+        roadmap_result = await _sb_exec(
+            supabase.table("learning_roadmaps")
+            .select("*")
+            .eq("id", roadmap_id)
+            .eq("user_id", user_id)
+        )
 
         if not roadmap_result.data:
             raise HTTPException(status_code=404, detail="Roadmap not found")
@@ -686,10 +728,11 @@ async def adapt_roadmap(
             "updated_at": datetime.now().isoformat()
         }
 
-        result = supabase.table("learning_roadmaps")\
-            .update(update_data)\
-            .eq("id", roadmap_id)\
-            .execute()
+        result = await _sb_exec(
+            supabase.table("learning_roadmaps")
+            .update(update_data)
+            .eq("id", roadmap_id)
+        )
 
         logger.info(f"Roadmap {roadmap_id} adapted successfully")
 
@@ -721,13 +764,14 @@ async def delete_roadmap(
         if not user_id:
             raise HTTPException(status_code=401, detail="User not authenticated")
 
-        supabase = get_supabase_client()
+        supabase = _sb()
 
-        result = supabase.table("learning_roadmaps")\
-            .update({"status": "abandoned"})\
-            .eq("id", roadmap_id)\
-            .eq("user_id", user_id)\
-            .execute()
+        result = await _sb_exec(
+            supabase.table("learning_roadmaps")
+            .update({"status": "abandoned"})
+            .eq("id", roadmap_id)
+            .eq("user_id", user_id)
+        )
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Roadmap not found")
@@ -747,29 +791,29 @@ async def delete_roadmap(
 # HELPER FUNCTIONS
 # ============================================================================
 
-async def _initialize_milestone_progress(user_id: str, roadmap_id: str, roadmap_data: Dict):
-    """Initialize milestone progress records for all milestones in the roadmap"""
-    try:
-        supabase = get_supabase_client()
-        progress_records = []
+async def _sb_exec(query):
+    """Execute a supabase-py query builder in a worker thread.
+
+    supabase-py is synchronous; running `.execute()` directly inside these
+    coroutines would block the event loop for the whole HTTP round-trip.
+    """
+    return await asyncio.to_thread(query.execute)
 
-        for phase in roadmap_data.get("phases", []):
-            for milestone in phase.get("milestones", []):
-                progress_records.append({
-                    "user_id": user_id,
-                    "roadmap_id": roadmap_id,
-                    "phase_id": phase["id"],
-                    "milestone_id": milestone["id"],
-                    "milestone_title": milestone.get("title"),
-                    "milestone_type": milestone.get("type"),
-                    "status": milestone.get("status", "not_started"),
-                    "progress_percentage": 0.0
-                })
 
-        if progress_records:
-            supabase.table("milestone_progress").insert(progress_records).execute()
+async def _initialize_milestone_progress(user_id: str, roadmap_id: str):
+    """Initialize milestone progress records for all milestones in the roadmap.
 
-        logger.info(f"Initialized {len(progress_records)} milestone progress records")
+    The rows are built server-side from the stored roadmap_data
+    (see sql/roadmap_progress_rpcs.sql).
+    """
+    try:
+        supabase = _sb()
+        result = await _sb_exec(supabase.rpc("initialize_milestone_progress", {
+            "p_roadmap_id": roadmap_id,
+            "p_user_id": user_id,
+        }))
+
+        logger.info(f"Initialized {result.data or 0} milestone progress records")
 
     except HTTPException:
         raise
@@ -781,13 +825,14 @@ async def _initialize_milestone_progress(user_id: str, roadmap_id: str, roadmap_
 async def _recalculate_roadmap_progress(roadmap_id: str):
     """Recalculate overall roadmap progress based on completed milestones"""
     try:
-        supabase = get_supabase_client()
+        supabase = _sb()
 
         # Get all milestone progress
-        progress_result = supabase.table("milestone_progress")\
-            .select("status")\
-            .eq("roadmap_id", roadmap_id)\
-            .execute()
+        progress_result = await _sb_exec(
+            supabase.table("milestone_progress")
+            .select("status")
+            .eq("roadmap_id", roadmap_id)
+        )
 
         total_milestones = len(progress_result.data)
         completed_milestones = sum(1 for mp in progress_result.data if mp["status"] == "completed")
@@ -805,10 +850,11 @@ async def _recalculate_roadmap_progress(roadmap_id: str):
             update_data["status"] = "completed"
             update_data["completed_at"] = datetime.now().isoformat()
 
-        supabase.table("learning_roadmaps")\
-            .update(update_data)\
-            .eq("id", roadmap_id)\
-            .execute()
+        await _sb_exec(
+            supabase.table("learning_roadmaps")
+            .update(update_data)
+            .eq("id", roadmap_id)
+        )
 
         logger.info(f"Roadmap progress updated: {completed_milestones}/{total_milestones} ({progress_percentage:.1f}%)")
 
@@ -824,14 +870,15 @@ async def _unlock_next_milestone(user_id: str, roadmap_id: str, completed_phase_
     This handles unlocking within the same phase and across phases.
     """
     try:
-        supabase = get_supabase_client()
+        supabase = _sb()
 
         # Get the roadmap to understand milestone structure
-        roadmap_result = supabase.table("learning_roadmaps")\
-            .select("*")\
-            .eq("id", roadmap_id)\
-            .single()\
-            .execute()
+        roadmap_result = await _sb_exec(
+            supabase.table("learning_roadmaps")
+            .select("*")
+            .eq("id", roadmap_id)
+            .single()
+        )
 
         if not roadmap_result.data:
             return
@@ -884,59 +931,55 @@ async def _unlock_next_milestone(user_id: str, roadmap_id: str, completed_phase_
 
         next_milestone_id = next_milestone_to_unlock.get("id")
 
-        # Check current status of next milestone
-        progress_check = supabase.table("milestone_progress")\
-            .select("status")\
-            .eq("user_id", user_id)\
-            .eq("roadmap_id", roadmap_id)\
-            .eq("milestone_id", next_milestone_id)\
-            .execute()
-
-        current_status = progress_check.data[0]["status"] if progress_check.data else "locked"
-
-        # Only unlock if currently locked
-        if current_status == "locked":
-            supabase.table("milestone_progress")\
-                .upsert({
-                    "user_id": user_id,
-                    "roadmap_id": roadmap_id,
-                    "phase_id": next_phase_id,
-                    "milestone_id": next_milestone_id,
-                    "milestone_title": next_milestone_to_unlock.get("title"),
-                    "milestone_type": next_milestone_to_unlock.get("type"),
-                    "status": "not_started",
-                    "progress_percentage": 0.0
-                }, on_conflict="user_id,roadmap_id,phase_id,milestone_id")\
-                .execute()
-
-            # Also update the current milestone pointer in the roadmap
-            supabase.table("learning_roadmaps").update({
-                "current_phase_id": next_phase_id,
-                "current_milestone_id": next_milestone_id
-            }).eq("id", roadmap_id).execute()
-
-            logger.info(f"Unlocked milestone {next_milestone_id} in phase {next_phase_id}")
+        # Conditional upsert + roadmap pointer move in one transaction: only
+        # rows that are missing or still 'locked' are written, and only those
+        # come back (see sql/roadmap_progress_rpcs.sql)
+        unlock_result = await _sb_exec(supabase.rpc("unlock_and_advance", {
+            "p_user_id": user_id,
+            "p_roadmap_id": roadmap_id,
+            "p_phase_id": next_phase_id,
+            "p_milestone_id": next_milestone_id,
+            "p_milestone_title": next_milestone_to_unlock.get("title"),
+            "p_milestone_type": next_milestone_to_unlock.get("type"),
+        }))
+
+        if unlock_result.data:
+            new_status = unlock_result.data[0].get("milestone_status")
+            logger.info(f"Unlocked milestone {next_milestone_id} in phase {next_phase_id} (status: {new_status})")
         else:
-            logger.info(f"Milestone {next_milestone_id} already unlocked (status: {current_status})")
+            logger.info(f"Milestone {next_milestone_id} already unlocked")
 
     except Exception as e:
         logger.error(f"Error unlocking next milestone: {e}", exc_info=True)
 
 
-async def _check_quiz_triggers(user_id: str, roadmap_id: str, completed_phase_id: str, completed_milestone_id: str) -> Optional[Dict[str, Any]]:
+async def _check_quiz_triggers(
+    user_id: str,
+    roadmap_id: str,
+    completed_phase_id: str,
+    completed_milestone_id: str,
+    completed_milestone_type: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
     """
     Check if completing this milestone should trigger a quiz offer.
     Returns quiz trigger data if a quiz should be offered, None otherwise.
+
+    When the caller already knows the milestone type, non-lessons return
+    before the roadmap is fetched.
     """
+    if completed_milestone_type and completed_milestone_type != "lesson":
+        return None
+
     try:
-        supabase = get_supabase_client()
+        supabase = _sb()
 
         # Get the roadmap to understand milestone structure
-        roadmap_result = supabase.table("learning_roadmaps")\
-            .select("*")\
-            .eq("id", roadmap_id)\
-            .single()\
-            .execute()
+        roadmap_result = await _sb_exec(
+            supabase.table("learning_roadmaps")
+            .select("*")
+            .eq("id", roadmap_id)
+            .single()
+        )
 
         if not roadmap_result.data:
             return None
@@ -978,12 +1021,13 @@ async def _check_quiz_triggers(user_id: str, roadmap_id: str, completed_phase_id
             return None
 
         # Check if quiz milestone is already completed or in progress
-        progress_result = supabase.table("milestone_progress")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .eq("roadmap_id", roadmap_id)\
-            .eq("milestone_id", next_quiz["id"])\
-            .execute()
+        progress_result = await _sb_exec(
+            supabase.table("milestone_progress")
+            .select("*")
+            .eq("user_id", user_id)
+            .eq("roadmap_id", roadmap_id)
+            .eq("milestone_id", next_quiz["id"])
+        )
 
         if progress_result.data:
             quiz_status = progress_result.data[0].get("status")
@@ -1011,22 +1055,37 @@ async def _check_quiz_triggers(user_id: str, roadmap_id: str, completed_phase_id
         return None
 
 
+def _progress_overlay(progress: Optional[Dict]) -> Dict:
+    """Milestone fields taken from a progress record ({} when there is none)"""
+    if not progress:
+        return {}
+    return {
+        "status": progress["status"],
+        "progress": progress.get("progress_percentage", 0.0),
+        "started_at": progress.get("started_at"),
+        "completed_at": progress.get("completed_at"),
+    }
+
+
 def _enrich_roadmap_with_progress(roadmap: Dict, milestone_progress: Dict) -> Dict:
-    """Enrich roadmap data with current progress information"""
-    enriched = roadmap.copy()
+    """Enrich roadmap data with current progress information.
 
-    # Update milestone statuses from progress records
-    for phase in enriched.get("roadmap_data", {}).get("phases", []):
-        for milestone in phase.get("milestones", []):
-            milestone_id = milestone["id"]
-            if milestone_id in milestone_progress:
-                progress = milestone_progress[milestone_id]
-                milestone["status"] = progress["status"]
-                milestone["progress"] = progress.get("progress_percentage", 0.0)
-                milestone["started_at"] = progress.get("started_at")
-                milestone["completed_at"] = progress.get("completed_at")
+    Builds new phase/milestone dicts instead of mutating the nested ones, so the
+    caller's roadmap (a shallow copy would still share them) is left untouched.
+    """
+    roadmap_data = roadmap.get("roadmap_data") or {}
+    phases = [
+        {
+            **phase,
+            "milestones": [
+                {**milestone, **_progress_overlay(milestone_progress.get(milestone["id"]))}
+                for milestone in phase.get("milestones", [])
+            ],
+        }
+        for phase in roadmap_data.get("phases", [])
+    ]
 
-    return enriched
+    return {**roadmap, "roadmap_data": {**roadmap_data, "phases": phases}}
 
 
 async def _emit_progress_chat_event(
@@ -1042,12 +1101,12 @@ async def _emit_progress_chat_event(
 
     Tries `learning_roadmaps.chat_session_id` first, then falls back to `conversation_id` → session lookup.
     """
-    supabase = get_supabase_client()
+    supabase = _sb()
     if not supabase:
         return
 
     # Load roadmap linkage metadata
-    roadmap_res = supabase.table("learning_roadmaps").select("id, title, conversation_id, chat_session_id").eq("id", roadmap_id).single().execute()
+    roadmap_res = await _sb_exec(supabase.table("learning_roadmaps").select("id, title, conversation_id, chat_session_id").eq("id", roadmap_id).single())
     if not roadmap_res.data:
         return
 
@@ -1057,7 +1116,7 @@ async def _emit_progress_chat_event(
     # If session_id missing, try to find by conversation_id
     if not session_id and roadmap.get("conversation_id"):
         try:
-            sess_q = supabase.table("chat_sessions").select("id").eq("conversation_id", roadmap["conversation_id"]).eq("user_id", user_id).limit(1).execute()
+            sess_q = await _sb_exec(supabase.table("chat_sessions").select("id").eq("conversation_id", roadmap["conversation_id"]).eq("user_id", user_id).limit(1))
             if sess_q.data:
                 session_id = sess_q.data[0]["id"]
         except Exception:
@@ -1068,15 +1127,13 @@ async def _emit_progress_chat_event(
         return
 
     # Compose a concise assistant message
-    status_text = {
-        "not_started": "set to not started",
-        "in_progress": "marked in progress",
-        "completed": "marked completed",
-    }.get(status, f"updated (status: {status})")
-
-    content = (
-        f"Progress update: Milestone `{milestone_id}` {status_text}. "
-        f"Roadmap `{roadmap['title']}` progress: {round(progress_percentage or 0, 1)}%."
+    status_text = _STATUS_TEXT.get(status) or f"updated (status: {status})"
+
+    content = _CONTENT_TMPL.format(
+        mid=milestone_id,
+        st=status_text,
+        title=roadmap["title"],
+        pct=round(progress_percentage or 0, 1),
     )
 
     metadata = {
@@ -1090,10 +1147,10 @@ async def _emit_progress_chat_event(
     }
 
     # Insert chat message as assistant final answer with metadata
-    supabase.table("chat_messages").insert({
+    await _sb_exec(supabase.table("chat_messages").insert({
         "session_id": session_id,
         "role": "assistant",
         "content": content,
         "message_type": "final_answer",
         "metadata": metadata,
-    }).execute()
+    }))
@@ -4,7 +4,9 @@ Runs the chat_roadmap_integration_enhancement.sql migration safely
 """
 
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Try to import optional dependencies
@@ -21,15 +23,104 @@ except ImportError:
     print("⚠️  supabase not installed, will provide manual instructions only")
     HAS_SUPABASE = False
 
+try:
+    import psycopg
+    HAS_PSYCOPG = True
+except ImportError:
+    HAS_PSYCOPG = False
+
+# Resolved once at import; migrations live in server/sql/
+_HERE = Path(__file__).resolve().parent
+SQL_DIR = _HERE / "sql"
+MIGRATION_FILE = SQL_DIR / "chat_roadmap_integration_enhancement.sql"
+
 def get_migration_sql() -> str:
-    """Read the migration SQL file"""
-    migration_file = Path(__file__).parent / "chat_roadmap_integration_enhancement.sql"
-    if not migration_file.exists():
-        raise FileNotFoundError(f"Migration file not found: {migration_file}")
-    
-    with open(migration_file, 'r', encoding='utf-8') as f:
+    """Read the migration SQL file (open() raises FileNotFoundError with the path)"""
+    with open(MIGRATION_FILE, 'r', encoding='utf-8') as f:
         return f.read()
 
+# Tokens that can contain ';' without ending a statement ($$ bodies, comments,
+# string literals), plus the bare ';' terminator. Unterminated bodies/strings
+# match up to the end of the buffer so they are never split early.
+_SPLITTER = re.compile(
+    r"\$\$.*?(?:\$\$|\Z)|/\*.*?(?:\*/|\Z)|--[^\n]*|'(?:[^']|'')*(?:'|\Z)|;",
+    re.DOTALL,
+)
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+def _has_code(sql: str) -> bool:
+    """True if the text is more than whitespace and comments"""
+    return bool(_COMMENTS.sub("", sql).strip())
+
+# Closing delimiter of each token kind that can run past the end of a line
+_CLOSERS = {"$$": "$$", "/*": "*/", "'": "'"}
+
+def _split_statements(sql: str, scan_from: int = 0, closer: str = None):
+    """Split SQL text into (complete statements, remainder, resume offset, open closer)
+
+    Scanning starts at scan_from. If closer is set, the text before
+    scan_from is inside an open token and the scan first looks for that
+    closing delimiter. The returned offset (relative to the remainder) and
+    closer describe where to pick up on the next call, so text is never
+    scanned twice.
+    """
+    statements = []
+    start = 0
+    pos = scan_from
+    if closer is not None:
+        end = sql.find(closer, pos)
+        if end == -1:
+            return statements, sql, max(pos, len(sql) - len(closer) + 1), closer
+        pos = end + len(closer)
+    for match in _SPLITTER.finditer(sql, pos):
+        token = match.group()
+        if token == ";":
+            statements.append(sql[start:match.end()])
+            start = match.end()
+            continue
+        opener = "'" if token[0] == "'" else token[:2]
+        closer = _CLOSERS.get(opener)
+        if match.end() == len(sql) and closer is not None:
+            # The buffer ends in a newline, so a token that reaches its end
+            # is still open: resume just after its opening delimiter
+            return statements, sql[start:], match.start() + len(opener) - start, closer
+    return statements, sql[start:], len(sql) - start, None
+
+def _iter_statements(migration_file: Path):
+    """Yield SQL statements one at a time, reading the file line by line.
+
+    Only lines containing ';' trigger a split, and each split resumes where
+    the previous one stopped (inside an open $$ body it only looks for the
+    closing $$), so no text is rescanned. Comment-only chunks are skipped.
+    """
+    pending = ""
+    offset = 0
+    closer = None
+    with open(migration_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            pending += line
+            if ";" not in line:
+                continue
+            statements, pending, offset, closer = _split_statements(pending, offset, closer)
+            for statement in statements:
+                if _has_code(statement):
+                    yield statement
+    if _has_code(pending):
+        yield pending
+
+def execute_migration(dsn: str) -> int:
+    """Execute the migration statement by statement over a direct connection.
+
+    Autocommit is on so the file's own BEGIN/COMMIT control the transaction.
+    Returns the number of statements executed.
+    """
+    count = 0
+    with psycopg.connect(dsn, autocommit=True) as conn, conn.cursor() as cur:
+        for statement in _iter_statements(MIGRATION_FILE):
+            cur.execute(statement)
+            count += 1
+    return count
+
 def run_migration():
     """Execute the migration SQL"""
     # Get Supabase credentials
@@ -44,7 +135,15 @@ def run_migration():
     elif HAS_SUPABASE:
         print(f"   {supabase_url[:50]}...")
     
+    database_url = os.getenv("DATABASE_URL")
+    
     try:
+        if HAS_PSYCOPG and database_url:
+            print("🚀 Executing migration over DATABASE_URL...")
+            count = execute_migration(database_url)
+            print(f"✅ Executed {count} statements")
+            return
+        
         print("📖 Reading migration file...")
         sql = get_migration_sql()
         
@@ -66,9 +165,13 @@ def run_migration():
         print(f"  psql <your-connection-string> -f chat_roadmap_integration_enhancement.sql")
         print()
         
+        print("OPTION 3 - This script:")
+        print("  pip install 'psycopg[binary]', set DATABASE_URL and re-run")
+        print()
+        
         print("=" * 80)
         print("\n✅ Migration file is ready at:")
-        print(f"   {Path(__file__).parent / 'chat_roadmap_integration_enhancement.sql'}")
+        print(f"   {MIGRATION_FILE}")
         
         # Try to verify current schema if supabase available
         if HAS_SUPABASE and supabase_url and supabase_key:
@@ -94,17 +197,27 @@ def verify_schema(supabase: Client):
             'conversation_quizzes'
         ]
         
+        # supabase-py blocks per request, so probe all tables concurrently.
+        # The sample rows are reused for the structure checks below.
+        with ThreadPoolExecutor(max_workers=len(tables_to_check)) as executor:
+            probes = {
+                table: executor.submit(
+                    lambda t=table: supabase.table(t).select("*").limit(1).execute()
+                )
+                for table in tables_to_check
+            }
+        
         print("\n📋 Checking existing tables:")
-        for table in tables_to_check:
+        for table, probe in probes.items():
             try:
-                result = supabase.table(table).select("*").limit(1).execute()
+                probe.result()
                 print(f"  ✅ {table} - exists")
             except Exception as e:
                 print(f"  ⚠️  {table} - may not exist or no access: {str(e)[:50]}")
         
         # Check chat_sessions columns
         print("\n🔍 Checking chat_sessions structure...")
-        result = supabase.table('chat_sessions').select("*").limit(1).execute()
+        result = probes['chat_sessions'].result()
         if result.data:
             sample = result.data[0] if result.data else {}
             columns = list(sample.keys()) if sample else []
@@ -121,7 +234,7 @@ def verify_schema(supabase: Client):
         # Check milestone_progress
         print("\n🔍 Checking milestone_progress structure...")
         try:
-            result = supabase.table('milestone_progress').select("*").limit(1).execute()
+            result = probes['milestone_progress'].result()
             if result.data:
                 sample = result.data[0] if result.data else {}
                 columns = list(sample.keys()) if sample else []
@@ -188,7 +301,7 @@ SELECT
 FROM chat_messages_backup_20251130;
 """
     
-    backup_file = Path(__file__).parent / "backup_before_migration.sql"
+    backup_file = SQL_DIR / "backup_before_migration.sql"
     with open(backup_file, 'w', encoding='utf-8') as f:
         f.write(backup_sql)
     
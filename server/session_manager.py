@@ -3,24 +3,93 @@ Session Manager for Chat-Roadmap-Quiz Integration
 Handles reliable message persistence with transactional saves and retry logic
 """
 
+import json
+import time
 import uuid
+import random
+import asyncio
 import logging
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+from collections import Counter, OrderedDict
+from typing import Optional, Dict, Any, List, Set, Tuple
+from datetime import datetime, timezone
 from supabase import Client
 
+try:
+    import asyncpg
+    HAS_ASYNCPG = True
+except ImportError:
+    HAS_ASYNCPG = False
+
 logger = logging.getLogger(__name__)
 
+# Columns written by SessionManager.save_message, in parameter order. id and
+# created_at are generated client-side on the asyncpg path so executemany
+# (which returns nothing) can still hand back saved rows in insertion order.
+_INSERT_MESSAGE_COLUMNS = (
+    "id", "created_at", "session_id", "role", "content", "message_type",
+    "thinking_content", "metadata", "content_html", "attachments"
+)
+_INSERT_MESSAGE_SQL = (
+    f"INSERT INTO chat_messages ({', '.join(_INSERT_MESSAGE_COLUMNS)}) "
+    f"VALUES ({', '.join(f'${i}' for i in range(1, len(_INSERT_MESSAGE_COLUMNS) + 1))})"
+)
+
+# Default message_type for save_message when the caller doesn't pass one
+_ROLE_TO_TYPE = {
+    'user': 'user_message',
+    'assistant': 'assistant_message',
+    'system': 'system'
+}
+
+# Columns returned by get_session_messages unless the caller asks for others;
+# thinking_content, content_html and attachments can be large
+DEFAULT_MESSAGE_COLUMNS = "id,role,content,message_type,metadata,created_at"
+
+# SQLSTATE classes worth retrying: connection exceptions, transaction
+# rollbacks (serialization failures, deadlocks), insufficient resources and
+# operator intervention. Anything else (constraint or type errors) fails again.
+_TRANSIENT_SQLSTATE_CLASSES = {"08", "40", "53", "57"}
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed write may succeed if retried
+
+    asyncpg errors carry the SQLSTATE as .sqlstate, PostgREST API errors as
+    .code. Errors without one (network failures, timeouts) count as transient.
+    """
+    code = getattr(error, "sqlstate", None) or getattr(error, "code", None)
+    if not isinstance(code, str) or len(code) != 5:
+        return True
+    return code[:2] in _TRANSIENT_SQLSTATE_CLASSES
+
 
 class SessionManager:
     """Manages chat sessions with reliable message persistence and roadmap linking"""
     
-    def __init__(self, supabase: Client):
+    def __init__(self, supabase: Client, pool: Optional["asyncpg.Pool"] = None):
         self.supabase = supabase
+        # Optional direct Postgres pool for message writes (see connect_pool);
+        # everything else keeps going through supabase-py
+        self.pool = pool
         self.max_retries = 3
-        self.retry_delay = 0.5  # seconds
+        # Retry waits use full-jitter exponential backoff:
+        # uniform(0, min(retry_max_delay, retry_delay * 2**attempt))
+        self.retry_delay = 0.1  # seconds
+        self.retry_max_delay = 8.0  # seconds
+        # Write coalescing: saves queued within batch_window are flushed as a
+        # single bulk insert (sooner once batch_size messages are waiting)
+        self.batch_window = 0.02  # seconds
+        self.batch_size = 32
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        # Sessions by (user_id, conversation_id); a chat sends a burst of
+        # messages then idles, so a short TTL absorbs repeat lookups
+        self._session_cache: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.session_cache_ttl = 30.0  # seconds
+        self.session_cache_size = 1024
     
-    def get_or_create_session(
+    async def get_or_create_session(
         self,
         user_id: str,
         conversation_id: Optional[str] = None,
@@ -49,41 +118,79 @@ class SessionManager:
             Session dict with id, user_id, conversation_id, roadmap_id, etc.
         """
         try:
+            # Fast path: active session for this conversation seen recently
+            if conversation_id:
+                session = self._cached_session(user_id, conversation_id)
+                if session and not session.get('ended_at') and (
+                    not roadmap_id or session.get('roadmap_id')
+                ):
+                    return session
+            
+            # Both ids are interpolated into the PostgREST or= filter below,
+            # where ',', '(' and ')' are syntax; only accept real UUIDs
+            for name, value in (("conversation_id", conversation_id), ("roadmap_id", roadmap_id)):
+                if value:
+                    try:
+                        uuid.UUID(value)
+                    except (ValueError, TypeError, AttributeError):
+                        raise ValueError(f"{name} must be a UUID, got {value!r}")
+            
+            # Look up both candidates in one round-trip: any session for the
+            # conversation, or an active session for the roadmap
+            filters = []
+            if conversation_id:
+                filters.append(f"conversation_id.eq.{conversation_id}")
+            if roadmap_id:
+                filters.append(f"and(roadmap_id.eq.{roadmap_id},ended_at.is.null)")
+            
+            candidates = []
+            if filters:
+                # No limit: a newer roadmap session must not crowd out the
+                # conversation match, and both sets are tiny per user
+                result = await asyncio.to_thread(
+                    self.supabase.table("chat_sessions").select("*").eq(
+                        "user_id", user_id
+                    ).or_(",".join(filters)).order(
+                        "created_at", desc=True
+                    ).execute
+                )
+                candidates = result.data or []
+            
             # Priority 1: Find by conversation_id (MOST IMPORTANT FOR CONTINUITY)
             if conversation_id:
-                result = self.supabase.table("chat_sessions").select("*").eq(
-                    "user_id", user_id
-                ).eq("conversation_id", conversation_id).order(
-                    "created_at", desc=True
-                ).limit(1).execute()
+                session = next(
+                    (s for s in candidates if s.get('conversation_id') == conversation_id),
+                    None
+                )
                 
-                if result.data:
-                    session = result.data[0]
-                    
+                if session:
                     # Check if session is still active (not ended)
                     if not session.get('ended_at'):
-                        logger.info(f"♻️ Reusing active session: {session['id']}")
+                        logger.info("♻️ Reusing active session: %s", session['id'])
                         
-                        # Update roadmap_id if provided and missing
+                        # Link roadmap_id if provided and missing; nothing here
+                        # needs the write's result, so don't wait on it
                         if roadmap_id and not session.get('roadmap_id'):
-                            self._update_session_roadmap(session['id'], roadmap_id)
+                            self._spawn(self._update_session_roadmap(session['id'], roadmap_id))
                             session['roadmap_id'] = roadmap_id
                         
+                        self._cache_session(session)
                         return session
                     else:
-                        logger.info(f"Session {session['id']} ended, will create new one")
+                        logger.info("Session %s ended, will create new one", session['id'])
             
             # Priority 2: Find active roadmap session
             if roadmap_id:
-                result = self.supabase.table("chat_sessions").select("*").eq(
-                    "user_id", user_id
-                ).eq("roadmap_id", roadmap_id).is_(
-                    "ended_at", "null"
-                ).order("created_at", desc=True).limit(1).execute()
+                session = next(
+                    (
+                        s for s in candidates
+                        if s.get('roadmap_id') == roadmap_id and not s.get('ended_at')
+                    ),
+                    None
+                )
                 
-                if result.data:
-                    session = result.data[0]
-                    logger.info(f"♻️ Reusing roadmap session: {session['id']}")
+                if session:
+                    logger.info("♻️ Reusing roadmap session: %s", session['id'])
                     return session
             
             # Create new session
@@ -99,20 +206,23 @@ class SessionManager:
                 "metadata": {}
             }
             
-            result = self.supabase.table("chat_sessions").insert(session_data).execute()
+            result = await asyncio.to_thread(
+                self.supabase.table("chat_sessions").insert(session_data).execute
+            )
             
             if result.data:
                 session = result.data[0]
-                logger.info(f"✨ Created new session: {session['id']}")
+                logger.info("✨ Created new session: %s", session['id'])
+                self._cache_session(session)
                 return session
             else:
                 raise Exception("Failed to create session: no data returned")
                 
         except Exception as e:
-            logger.error(f"Error in get_or_create_session: {e}")
+            logger.error("Error in get_or_create_session: %s", e)
             raise
     
-    def save_message(
+    async def save_message(
         self,
         session_id: str,
         role: str,
@@ -126,6 +236,9 @@ class SessionManager:
         """
         Save a message with retry logic and transaction safety
         
+        The message is queued and written together with any other messages
+        saved concurrently on this manager (see save_messages_bulk).
+        
         Args:
             session_id: Chat session UUID
             role: 'user', 'assistant', or 'system'
@@ -142,11 +255,7 @@ class SessionManager:
         """
         # Auto-detect message_type from role if not provided
         if not message_type:
-            message_type = {
-                'user': 'user_message',
-                'assistant': 'assistant_message',
-                'system': 'system'
-            }.get(role, 'assistant_message')
+            message_type = _ROLE_TO_TYPE.get(role, 'assistant_message')
         
         message_data = {
             "session_id": session_id,
@@ -159,39 +268,232 @@ class SessionManager:
             "attachments": attachments or []
         }
         
-        # Retry logic for message save
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((message_data, future))
+        
+        if len(self._pending) >= self.batch_size:
+            self._spawn(self._flush())
+        elif self._flush_task is None:
+            self._flush_task = self._spawn(self._flush_soon())
+        
+        try:
+            message = await future
+        except Exception:
+            logger.error(
+                "CRITICAL: Failed to save message. "
+                "Session: %s, Role: %s, Type: %s",
+                session_id, role, message_type
+            )
+            raise
+        
+        logger.info("Saved message %s (type: %s)", message['id'], message_type)
+        return message
+    
+    async def save_messages_bulk(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert several chat_messages rows in one request, with retry logic
+        
+        Goes straight to Postgres when a pool is connected, otherwise through
+        PostgREST. Transient failures retry the whole batch; errors the
+        database would raise again (constraint violations, bad values) are
+        raised at once.
+        
+        Returns:
+            Saved message dicts, in the same order as `messages`
+        """
+        if self.pool is not None:
+            saved = await self._retry(
+                lambda: self._insert_messages_pg(messages), "Bulk message save"
+            )
+        else:
+            result = await self._execute_with_retry(
+                self.supabase.table("chat_messages").insert(messages),
+                "Bulk message save",
+                require_data=True
+            )
+            saved = result.data
+        logger.info("Saved %d message(s)", len(messages))
+        return saved
+    
+    async def connect_pool(self, dsn: str, min_size: int = 5, max_size: int = 20) -> bool:
+        """
+        Open an asyncpg pool used for message writes
+        
+        The statement cache is disabled so the pool works through
+        Supavisor/PgBouncer in transaction mode.
+        
+        Returns:
+            True if the pool is ready, False if asyncpg is missing or the
+            connection failed (writes then stay on supabase-py)
+        """
+        if not HAS_ASYNCPG:
+            logger.warning("asyncpg not installed; message writes use supabase-py")
+            return False
+        
+        async def _init(conn) -> None:
+            await conn.set_type_codec(
+                "jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+            )
+        
+        try:
+            self.pool = await asyncpg.create_pool(
+                dsn,
+                min_size=min_size,
+                max_size=max_size,
+                statement_cache_size=0,
+                init=_init
+            )
+        except Exception as e:
+            logger.error("Failed to connect Postgres pool, using supabase-py: %s", e)
+            return False
+        
+        logger.info("Connected Postgres pool for message writes")
+        return True
+    
+    async def drain(self) -> None:
+        """Write queued messages now and wait for background writes to finish"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+    
+    async def close_pool(self) -> None:
+        """Drain queued messages, then close the Postgres pool"""
+        await self.drain()
+        if self.pool is not None:
+            pool, self.pool = self.pool, None
+            await pool.close()
+    
+    async def _insert_messages_pg(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert messages with one executemany in a single transaction"""
+        rows = []
+        args = []
+        for message in messages:
+            message_id = uuid.uuid4()
+            created_at = datetime.now(timezone.utc)
+            args.append(
+                (message_id, created_at)
+                + tuple(message.get(column) for column in _INSERT_MESSAGE_COLUMNS[2:])
+            )
+            rows.append({
+                **message,
+                "id": str(message_id),
+                "created_at": created_at.isoformat()
+            })
+        
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(_INSERT_MESSAGE_SQL, args)
+        return rows
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff so concurrent writers don't retry in lockstep"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_delay * (2 ** attempt)))
+    
+    async def _execute_with_retry(self, query, action: str, require_data: bool = False):
+        """
+        Execute a supabase-py query off the event loop, retrying failures
+        
+        Args:
+            query: Query builder to execute
+            action: Description used in log messages
+            require_data: Treat an empty result as a failure
+        """
+        async def _execute():
+            result = await asyncio.to_thread(query.execute)
+            
+            if require_data and not result.data:
+                raise Exception("No data returned")
+            return result
+        
+        return await self._retry(_execute, action)
+    
+    async def _retry(self, operation, action: str):
+        """
+        Await operation(), retrying failures with backoff
+        
+        Args:
+            operation: Zero-argument callable returning an awaitable
+            action: Description used in log messages
+        """
         for attempt in range(self.max_retries):
             try:
-                result = self.supabase.table("chat_messages").insert(message_data).execute()
-                
-                if result.data:
-                    message = result.data[0]
-                    logger.info(
-                        f"Saved message {message['id']} (type: {message_type}, "
-                        f"attempt: {attempt + 1}/{self.max_retries})"
-                    )
-                    return message
-                else:
-                    raise Exception("No data returned from insert")
-                    
+                return await operation()
             except Exception as e:
                 logger.warning(
-                    f"Message save attempt {attempt + 1}/{self.max_retries} failed: {e}"
+                    "%s attempt %d/%d failed: %s",
+                    action, attempt + 1, self.max_retries, e
                 )
                 
-                if attempt == self.max_retries - 1:
-                    # Final attempt failed - log critical error
-                    logger.error(
-                        f"CRITICAL: Failed to save message after {self.max_retries} attempts. "
-                        f"Session: {session_id}, Role: {role}, Type: {message_type}"
-                    )
+                if attempt == self.max_retries - 1 or not _is_transient(e):
                     raise
                 
                 # Wait before retry
-                import time
-                time.sleep(self.retry_delay * (attempt + 1))
+                await asyncio.sleep(self._backoff_delay(attempt))
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        """Start a background flush and keep a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        return task
     
-    def save_message_streaming(
+    async def _flush_soon(self) -> None:
+        """Flush the queue once the batch window has passed"""
+        await asyncio.sleep(self.batch_window)
+        self._flush_task = None
+        await self._flush()
+    
+    async def _flush(self) -> None:
+        """Write every queued message with one bulk insert and resolve their futures"""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        saved: List[Any] = []
+        error: Optional[Exception] = None  # None: the flush was cancelled
+        try:
+            try:
+                saved = await self.save_messages_bulk([data for data, _ in batch])
+            except Exception as e:
+                if len(batch) == 1 or _is_transient(e):
+                    raise
+                # One bad row fails the whole insert; save the messages one by
+                # one so only the offending request sees the error
+                logger.warning("Bulk message save rejected, saving individually: %s", e)
+                results = await asyncio.gather(
+                    *(self.save_messages_bulk([data]) for data, _ in batch),
+                    return_exceptions=True
+                )
+                saved = [
+                    result if isinstance(result, BaseException) else result[0]
+                    for result in results
+                ]
+            error = RuntimeError(
+                f"Bulk insert returned {len(saved)} row(s) for {len(batch)} message(s)"
+            )
+        except Exception as e:
+            error = e
+        finally:
+            # Every future must be resolved, or its save_message waits forever
+            for (_, future), message in zip(batch, saved):
+                if future.done():
+                    continue
+                if isinstance(message, BaseException):
+                    future.set_exception(message)
+                else:
+                    future.set_result(message)
+            for _, future in batch:
+                if future.done():
+                    continue
+                if error is None:
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+    
+    async def save_message_streaming(
         self,
         session_id: str,
         role: str,
@@ -205,7 +507,7 @@ class SessionManager:
         Used for immediate persistence during SSE streaming
         """
         try:
-            message = self.save_message(
+            message = await self.save_message(
                 session_id=session_id,
                 role=role,
                 content=content,
@@ -215,10 +517,10 @@ class SessionManager:
             )
             return message['id']
         except Exception as e:
-            logger.error(f"Failed to save streaming message: {e}")
+            logger.error("Failed to save streaming message: %s", e)
             return None
     
-    def update_message(
+    async def update_message(
         self,
         message_id: str,
         updates: Dict[str, Any]
@@ -234,24 +536,23 @@ class SessionManager:
             Updated message dict
         """
         try:
-            result = self.supabase.table("chat_messages").update(updates).eq(
-                "id", message_id
-            ).execute()
-            
-            if result.data:
-                return result.data[0]
-            else:
-                raise Exception("No data returned from update")
+            result = await self._execute_with_retry(
+                self.supabase.table("chat_messages").update(updates).eq("id", message_id),
+                f"Message {message_id} update",
+                require_data=True
+            )
+            return result.data[0]
                 
         except Exception as e:
-            logger.error(f"Failed to update message {message_id}: {e}")
+            logger.error("Failed to update message %s: %s", message_id, e)
             raise
     
     def get_session_messages(
         self,
         session_id: str,
         limit: Optional[int] = None,
-        include_thinking: bool = False
+        include_thinking: bool = False,
+        columns: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve all messages for a session
@@ -260,12 +561,19 @@ class SessionManager:
             session_id: Chat session UUID
             limit: Optional max number of messages
             include_thinking: Include thinking_content in results
+            columns: Explicit select list (defaults to DEFAULT_MESSAGE_COLUMNS);
+                     request content_html/attachments here when needed
             
         Returns:
             List of message dicts ordered by created_at
         """
         try:
-            query = self.supabase.table("chat_messages").select("*").eq(
+            if columns is None:
+                columns = DEFAULT_MESSAGE_COLUMNS
+                if include_thinking:
+                    columns += ",thinking_content"
+            
+            query = self.supabase.table("chat_messages").select(columns).eq(
                 "session_id", session_id
             ).order("created_at", desc=False)
             
@@ -273,17 +581,10 @@ class SessionManager:
                 query = query.limit(limit)
             
             result = query.execute()
-            messages = result.data or []
-            
-            # Filter out thinking_content if not requested
-            if not include_thinking:
-                for msg in messages:
-                    msg.pop('thinking_content', None)
-            
-            return messages
+            return result.data or []
             
         except Exception as e:
-            logger.error(f"Failed to get session messages: {e}")
+            logger.error("Failed to get session messages: %s", e)
             return []
     
     def get_session_by_conversation_id(
@@ -292,6 +593,10 @@ class SessionManager:
         conversation_id: str
     ) -> Optional[Dict[str, Any]]:
         """Get session by legacy conversation_id"""
+        session = self._cached_session(user_id, conversation_id)
+        if session:
+            return session
+        
         try:
             result = self.supabase.table("chat_sessions").select("*").eq(
                 "user_id", user_id
@@ -299,10 +604,13 @@ class SessionManager:
                 "created_at", desc=True
             ).limit(1).execute()
             
-            return result.data[0] if result.data else None
+            if not result.data:
+                return None
+            self._cache_session(result.data[0])
+            return result.data[0]
             
         except Exception as e:
-            logger.error(f"Failed to get session by conversation_id: {e}")
+            logger.error("Failed to get session by conversation_id: %s", e)
             return None
     
     def end_session(self, session_id: str) -> None:
@@ -310,26 +618,56 @@ class SessionManager:
         try:
             self.supabase.table("chat_sessions").update({
                 "ended_at": datetime.utcnow().isoformat()
-            }).eq("id", session_id).execute()
+            }, returning="minimal").eq("id", session_id).execute()
+            self._invalidate_session(session_id)
             
-            logger.info(f"Ended session: {session_id}")
+            logger.info("Ended session: %s", session_id)
             
         except Exception as e:
-            logger.error(f"Failed to end session {session_id}: {e}")
+            logger.error("Failed to end session %s: %s", session_id, e)
     
-    def _update_session_roadmap(self, session_id: str, roadmap_id: str) -> None:
+    async def _update_session_roadmap(self, session_id: str, roadmap_id: str) -> None:
         """Internal: Update session's roadmap_id"""
         try:
-            self.supabase.table("chat_sessions").update({
-                "roadmap_id": roadmap_id
-            }).eq("id", session_id).execute()
+            await self._execute_with_retry(
+                self.supabase.table("chat_sessions").update({
+                    "roadmap_id": roadmap_id
+                }, returning="minimal").eq("id", session_id),
+                "Session roadmap update"
+            )
+            self._invalidate_session(session_id)
             
-            logger.info(f"Updated session {session_id} with roadmap {roadmap_id}")
+            logger.info("Updated session %s with roadmap %s", session_id, roadmap_id)
             
         except Exception as e:
-            logger.error(f"Failed to update session roadmap: {e}")
+            logger.error("Failed to update session roadmap: %s", e)
+    
+    def _cached_session(self, user_id: str, conversation_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._session_cache.get((user_id, conversation_id))
+        if entry is None:
+            return None
+        session, cached_at = entry
+        if time.monotonic() - cached_at >= self.session_cache_ttl:
+            del self._session_cache[(user_id, conversation_id)]
+            return None
+        self._session_cache.move_to_end((user_id, conversation_id))
+        return session
+    
+    def _cache_session(self, session: Dict[str, Any]) -> None:
+        if not session.get('user_id') or not session.get('conversation_id'):
+            return
+        key = (session['user_id'], session['conversation_id'])
+        self._session_cache[key] = (session, time.monotonic())
+        self._session_cache.move_to_end(key)
+        if len(self._session_cache) > self.session_cache_size:
+            self._session_cache.popitem(last=False)
+    
+    def _invalidate_session(self, session_id: str) -> None:
+        for key, (session, _) in list(self._session_cache.items()):
+            if session.get('id') == session_id:
+                del self._session_cache[key]
     
-    def link_roadmap_to_session(
+    async def link_roadmap_to_session(
         self,
         session_id: str,
         roadmap_id: str
@@ -338,29 +676,37 @@ class SessionManager:
         Link a roadmap to an existing session
         Called when user generates roadmap during chat
         """
-        self._update_session_roadmap(session_id, roadmap_id)
+        await self._update_session_roadmap(session_id, roadmap_id)
     
     def get_session_statistics(self, session_id: str) -> Dict[str, Any]:
-        """Get comprehensive session statistics"""
+        """
+        Get comprehensive session statistics
+        
+        Reads the counters a trigger keeps on the chat_sessions row
+        (sql/session_message_counters.sql). Falls back to the
+        get_session_statistics() RPC, then to counting messages locally, on
+        databases that lack those migrations.
+        """
         try:
-            messages = self.get_session_messages(session_id)
+            stats = None
+            for source in (
+                self._read_session_counters,
+                self._aggregate_session_messages,
+                self._count_session_messages
+            ):
+                try:
+                    stats = source(session_id)
+                    break
+                except Exception as e:
+                    logger.warning("Session statistics via %s failed: %s", source.__name__, e)
             
-            stats = {
-                "total_messages": len(messages),
-                "user_messages": len([m for m in messages if m['message_type'] in ['user', 'user_message']]),
-                "assistant_messages": len([m for m in messages if m['message_type'] in ['assistant', 'assistant_message']]),
-                "roadmap_triggers": len([m for m in messages if m['message_type'] == 'roadmap_trigger']),
-                "quiz_triggers": len([m for m in messages if m['message_type'] == 'quiz_trigger']),
-                "milestone_updates": len([m for m in messages if m['message_type'] == 'milestone_update']),
-                "first_message_at": messages[0]['created_at'] if messages else None,
-                "last_message_at": messages[-1]['created_at'] if messages else None
-            }
+            if stats is None:
+                return {}
             
             # Calculate duration
             if stats['first_message_at'] and stats['last_message_at']:
-                from dateutil import parser
-                start = parser.parse(stats['first_message_at'])
-                end = parser.parse(stats['last_message_at'])
+                start = datetime.fromisoformat(stats['first_message_at'].replace('Z', '+00:00'))
+                end = datetime.fromisoformat(stats['last_message_at'].replace('Z', '+00:00'))
                 duration_minutes = (end - start).total_seconds() / 60
                 stats['session_duration_minutes'] = round(duration_minutes, 2)
             else:
@@ -369,5 +715,64 @@ class SessionManager:
             return stats
             
         except Exception as e:
-            logger.error(f"Failed to get session statistics: {e}")
+            logger.error("Failed to get session statistics: %s", e)
             return {}
+    
+    def _read_session_counters(self, session_id: str) -> Dict[str, Any]:
+        """Session statistics from the trigger-maintained chat_sessions counters"""
+        result = self.supabase.table("chat_sessions").select(
+            "message_count,user_message_count,assistant_message_count,"
+            "roadmap_trigger_count,quiz_trigger_count,milestone_update_count,"
+            "first_message_at,last_message_at"
+        ).eq("id", session_id).single().execute()
+        row = result.data
+        
+        return {
+            "total_messages": row.get("message_count") or 0,
+            "user_messages": row.get("user_message_count") or 0,
+            "assistant_messages": row.get("assistant_message_count") or 0,
+            "roadmap_triggers": row.get("roadmap_trigger_count") or 0,
+            "quiz_triggers": row.get("quiz_trigger_count") or 0,
+            "milestone_updates": row.get("milestone_update_count") or 0,
+            "first_message_at": row.get("first_message_at"),
+            "last_message_at": row.get("last_message_at")
+        }
+    
+    def _aggregate_session_messages(self, session_id: str) -> Dict[str, Any]:
+        """Session statistics aggregated in Postgres by the get_session_statistics() RPC"""
+        result = self.supabase.rpc(
+            "get_session_statistics", {"p_session_id": session_id}
+        ).execute()
+        row = result.data[0] if result.data else {}
+        
+        return {
+            "total_messages": row.get("total_messages") or 0,
+            "user_messages": row.get("user_messages") or 0,
+            "assistant_messages": row.get("assistant_messages") or 0,
+            "roadmap_triggers": row.get("roadmap_triggers") or 0,
+            "quiz_triggers": row.get("quiz_triggers") or 0,
+            "milestone_updates": row.get("milestone_updates") or 0,
+            "first_message_at": row.get("first_message_at"),
+            "last_message_at": row.get("last_message_at")
+        }
+    
+    def _count_session_messages(self, session_id: str) -> Dict[str, Any]:
+        """Session statistics counted client-side from the session's messages"""
+        # count="exact" keeps total_messages right even when PostgREST's
+        # max-rows setting truncates the returned rows
+        result = self.supabase.table("chat_messages").select(
+            "message_type,created_at", count="exact"
+        ).eq("session_id", session_id).order("created_at", desc=False).execute()
+        messages = result.data or []
+        counts = Counter(m['message_type'] for m in messages)
+        
+        return {
+            "total_messages": result.count if result.count is not None else len(messages),
+            "user_messages": counts['user'] + counts['user_message'],
+            "assistant_messages": counts['assistant'] + counts['assistant_message'],
+            "roadmap_triggers": counts['roadmap_trigger'],
+            "quiz_triggers": counts['quiz_trigger'],
+            "milestone_updates": counts['milestone_update'],
+            "first_message_at": messages[0]['created_at'] if messages else None,
+            "last_message_at": messages[-1]['created_at'] if messages else None
+        }
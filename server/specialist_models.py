@@ -5,8 +5,19 @@ Uses local Ollama models for domain-specific tasks
 from __future__ import annotations
 
 import json
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+import httpx
+
+try:
+    import orjson  # optional: faster decoding of verifier JSON
+except ImportError:
+    orjson = None
 from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage
 
@@ -24,35 +35,140 @@ MODELS = {
     "embedding": "embeddinggemma:latest"
 }
 
+
+# Keep specialist models loaded between requests so Ollama can reuse the KV
+# cache of the fixed system-prompt prefix instead of reloading and re-prefilling
+_OLLAMA_KEEP_ALIVE = "30m"
+
+# Connection pool for the Ollama HTTP clients behind each cached ChatOllama, so
+# concurrent solve/verify fan-out reuses keep-alive connections
+_OLLAMA_CLIENT_KWARGS = {
+    "limits": httpx.Limits(max_keepalive_connections=32, max_connections=64)
+}
+
+
+@lru_cache(maxsize=16)
+def _get_llm(
+    model: str,
+    temperature: float,
+    num_predict: int,
+    format: Optional[str] = None
+) -> ChatOllama:
+    """Shared ChatOllama client per (model, temperature, num_predict, format)"""
+    return ChatOllama(
+        model=model,
+        temperature=temperature,
+        num_predict=num_predict,
+        format=format,
+        keep_alive=_OLLAMA_KEEP_ALIVE,
+        client_kwargs=_OLLAMA_CLIENT_KWARGS
+    )
+
+
 # ============================================================================
-# MATH SOLVER
+# RESPONSE CACHE
 # ============================================================================
 
-def solve_math(problem: str, show_steps: bool = True, verify: bool = True) -> Dict[str, Any]:
-    """
-    Solve mathematical problems using gemma3-math fine-tuned model.
+# Exact-match cache of model responses, keyed on the model config and prompt.
+# Repeat questions (quiz re-grades, duplicate roadmap questions) skip inference.
+_RESPONSE_CACHE_SIZE = 256
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+_response_cache_lock = threading.Lock()
 
-    Args:
-        problem: Math problem to solve
-        show_steps: Whether to show step-by-step solution
-        verify: Whether to verify the answer with gemma3:4b
 
-    Returns:
-        Solution with steps and optional verification
-    """
-    logger.info(f"🔢 Solving math problem with gemma3-math: {problem[:100]}")
+def _cache_key(llm: ChatOllama, messages: List[Any]) -> str:
+    parts = [llm.model, str(llm.temperature), str(llm.num_predict), str(llm.format)]
+    parts.extend(m.content for m in messages)
+    return hashlib.blake2b("\x00".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def _cache_get(key: str, model: str) -> Optional[str]:
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+        if cached is not None:
+            _response_cache.move_to_end(key)
+            logger.info(f"⚡ Response cache hit for {model}")
+        return cached
+
+
+def _cache_put(key: str, content: str) -> None:
+    with _response_cache_lock:
+        _response_cache[key] = content
+        if len(_response_cache) > _RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
 
+def _invoke_cached(llm: ChatOllama, messages: List[Any]) -> str:
+    """Invoke the model, returning a cached response for an identical prompt"""
+    key = _cache_key(llm, messages)
+    cached = _cache_get(key, llm.model)
+    if cached is not None:
+        return cached
+
+    content = llm.invoke(messages).content
+    _cache_put(key, content)
+    return content
+
+
+# ============================================================================
+# RESPONSE PARSING
+# ============================================================================
+
+_MATH_SECTIONS_RE = re.compile(r"(SOLUTION|STEPS):")
+_CODE_SECTIONS_RE = re.compile(r"(EXPLANATION|TIME_COMPLEXITY|SPACE_COMPLEXITY):")
+_CODE_FENCE_RE = re.compile(r"```([\w+#-]*)(.*?)(?:```|\Z)", re.DOTALL)
+
+
+def _parse_sections(pattern: re.Pattern, text: str) -> Dict[str, str]:
+    """Split a labelled model response into {LABEL: body} in one pass (first occurrence wins)"""
+    sections: Dict[str, str] = {}
+    matches = list(pattern.finditer(text))
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(text)
+        sections.setdefault(match.group(1), text[match.end():end])
+    return sections
+
+
+def _first_line(section: str) -> str:
+    return section.partition("\n")[0].strip()
+
+
+def _json_object(text: str) -> Dict[str, Any]:
+    """Decode a format="json" response, rejecting anything but an object"""
+    parsed = orjson.loads(text) if orjson is not None else json.loads(text)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Expected a JSON object, got {type(parsed).__name__}")
+    return parsed
+
+
+def _json_list(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [] if value.strip().lower() == "none" else [value.strip()]
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def _json_text(value: Any, default: str) -> str:
+    text = str(value).strip().lower() if value is not None else ""
+    return text or default
+
+
+def _json_float(value: Any, default: float) -> float:
+    if isinstance(value, bool):
+        return default
     try:
-        # Initialize gemma3-math model
-        math_llm = ChatOllama(
-            model=MODELS["math"],
-            temperature=0.1,
-            num_predict=1000
-        )
+        return float(value)
+    except (TypeError, ValueError):
+        return default
 
-        # Create prompt
-        if show_steps:
-            system_prompt = """You are Gemma3-Math, a fine-tuned mathematical reasoning specialist. Solve the problem with rigorous step-by-step reasoning.
+
+# ============================================================================
+# MATH SOLVER
+# ============================================================================
+
+# System prompts are built once so every call sends a byte-identical prefix
+_MATH_STEPS_SYSTEM = SystemMessage(content="""You are Gemma3-Math, a fine-tuned mathematical reasoning specialist. Solve the problem with rigorous step-by-step reasoning.
 
 Format your response as:
 SOLUTION: [final answer with units if applicable]
@@ -68,52 +184,66 @@ Guidelines:
 - Justify each major step with reasoning
 - Check your work and verify units/constraints
 - For complex problems, break into sub-problems
-- State any assumptions clearly"""
-        else:
-            system_prompt = """You are Gemma3-Math, a fine-tuned mathematical specialist. Provide the final answer with brief justification."""
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Problem: {problem}")
-        ]
-
-        # Get solution
-        response = math_llm.invoke(messages)
-        solution_text = response.content
-
-        # Parse solution and steps
-        solution = None
-        steps = []
-
-        if "SOLUTION:" in solution_text:
-            parts = solution_text.split("SOLUTION:", 1)
-            if len(parts) > 1:
-                solution_part = parts[1].split("STEPS:", 1)[0].strip()
-                solution = solution_part
-
-                if "STEPS:" in solution_text:
-                    steps_part = solution_text.split("STEPS:", 1)[1].strip()
-                    steps = [s.strip() for s in steps_part.split("\n") if s.strip()]
-
-        if not solution:
-            solution = solution_text.strip()
-
-        result = {
-            "solution": solution,
-            "steps": steps if show_steps else [],
-            "full_response": solution_text
-        }
+- State any assumptions clearly""")
+
+_MATH_BRIEF_SYSTEM = SystemMessage(content="""You are Gemma3-Math, a fine-tuned mathematical specialist. Provide the final answer with brief justification.""")
+
+
+def _math_messages(problem: str, show_steps: bool) -> List[Any]:
+    return [
+        _MATH_STEPS_SYSTEM if show_steps else _MATH_BRIEF_SYSTEM,
+        HumanMessage(content=f"Problem: {problem}")
+    ]
+
+
+def _parse_math(solution_text: str, show_steps: bool) -> Tuple[Dict[str, Any], str]:
+    """Parse a math response; also returns the explanation to hand the verifier"""
+    sections = _parse_sections(_MATH_SECTIONS_RE, solution_text)
+    solution = sections["SOLUTION"].strip() if "SOLUTION" in sections else None
+    steps = []
+
+    if solution is not None and "STEPS" in sections:
+        steps = [s.strip() for s in sections["STEPS"].split("\n") if s.strip()]
+
+    if not solution:
+        solution = solution_text.strip()
+
+    result = {
+        "solution": solution,
+        "steps": steps if show_steps else [],
+        "full_response": solution_text
+    }
+    return result, "\n".join(steps) if steps else solution_text
+
+
+def solve_math(problem: str, show_steps: bool = True, verify: bool = True) -> Dict[str, Any]:
+    """
+    Solve mathematical problems using gemma3-math fine-tuned model.
+
+    Args:
+        problem: Math problem to solve
+        show_steps: Whether to show step-by-step solution
+        verify: Whether to verify the answer with gemma3:4b
+
+    Returns:
+        Solution with steps and optional verification
+    """
+    logger.info(f"🔢 Solving math problem with gemma3-math: {problem[:100]}")
+
+    try:
+        math_llm = _get_llm(MODELS["math"], 0.1, 1000)
+        solution_text = _invoke_cached(math_llm, _math_messages(problem, show_steps))
+        result, explanation = _parse_math(solution_text, show_steps)
 
         # Verify if requested
         if verify:
-            verification = verify_answer(
+            result["verification"] = verify_answer(
                 question=problem,
-                answer=solution,
-                explanation="\n".join(steps) if steps else solution_text
+                answer=result["solution"],
+                explanation=explanation
             )
-            result["verification"] = verification
 
-        logger.info(f"✅ Math solution generated: {solution[:100]}")
+        logger.info(f"✅ Math solution generated: {result['solution'][:100]}")
         return result
 
     except Exception as e:
@@ -129,6 +259,81 @@ Guidelines:
 # CODE SOLVER
 # ============================================================================
 
+@lru_cache(maxsize=32)
+def _code_system(language: str) -> SystemMessage:
+    return SystemMessage(content=f"""You are an expert {language} programmer. Write clean, efficient code.
+
+Format your response as:
+CODE:
+```{language}
+[your code here]
+```
+
+EXPLANATION:
+[brief explanation of the approach]
+
+TIME_COMPLEXITY: [e.g., O(n)]
+SPACE_COMPLEXITY: [e.g., O(1)]
+""")
+
+
+def _code_messages(task: str, language: str, test_cases: Optional[List[Dict]]) -> List[Any]:
+    test_info = ""
+    if test_cases:
+        test_info = f"\n\nTest cases:\n{json.dumps(test_cases, separators=(',', ':'), ensure_ascii=False)}"
+
+    return [
+        _code_system(language),
+        HumanMessage(content=f"Task: {task}{test_info}")
+    ]
+
+
+def _parse_code(
+    response_text: str,
+    language: str,
+    test_cases: Optional[List[Dict]]
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Parse a code response; also returns the extracted code block (if any)"""
+    sections = _parse_sections(_CODE_SECTIONS_RE, response_text)
+
+    # Extract code block, preferring one tagged with the requested language
+    fences = _CODE_FENCE_RE.findall(response_text)
+    code = next(
+        (body for tag, body in fences if tag == language),
+        fences[0][0] + fences[0][1] if fences else None
+    )
+    if code is not None:
+        code = code.strip()
+
+    explanation = sections["EXPLANATION"].strip() if "EXPLANATION" in sections else None
+    time_complexity = _first_line(sections["TIME_COMPLEXITY"]) if "TIME_COMPLEXITY" in sections else None
+    space_complexity = _first_line(sections["SPACE_COMPLEXITY"]) if "SPACE_COMPLEXITY" in sections else None
+
+    result = {
+        "code": code or response_text,
+        "explanation": explanation,
+        "time_complexity": time_complexity,
+        "space_complexity": space_complexity,
+        "language": language,
+        "full_response": response_text
+    }
+
+    # Run test cases if provided
+    if test_cases and code:
+        test_results = []
+        # Note: Actual execution would require safe sandboxing
+        # For now, just return structure
+        for tc in test_cases:
+            test_results.append({
+                "input": tc.get("input"),
+                "expected": tc.get("expected"),
+                "status": "pending"  # Would be "passed"/"failed" after execution
+            })
+        result["test_results"] = test_results
+
+    return result, code
+
+
 def solve_code(
     task: str,
     language: str = "python",
@@ -150,104 +355,17 @@ def solve_code(
     logger.info(f"💻 Solving code task with qwen2.5-coder:7b: {task[:100]}")
 
     try:
-        # Initialize code model
-        code_llm = ChatOllama(
-            model=MODELS["code"],
-            temperature=0.2,
-            num_predict=2000
-        )
-
-        # Create prompt
-        system_prompt = f"""You are an expert {language} programmer. Write clean, efficient code.
-
-Format your response as:
-CODE:
-```{language}
-[your code here]
-```
-
-EXPLANATION:
-[brief explanation of the approach]
-
-TIME_COMPLEXITY: [e.g., O(n)]
-SPACE_COMPLEXITY: [e.g., O(1)]
-"""
-
-        test_info = ""
-        if test_cases:
-            test_info = f"\n\nTest cases:\n{json.dumps(test_cases, indent=2)}"
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Task: {task}{test_info}")
-        ]
-
-        # Get code solution
-        response = code_llm.invoke(messages)
-        response_text = response.content
-
-        # Parse code and explanation
-        code = None
-        explanation = None
-        time_complexity = None
-        space_complexity = None
-
-        # Extract code block
-        if f"```{language}" in response_text:
-            parts = response_text.split(f"```{language}", 1)
-            if len(parts) > 1:
-                code_part = parts[1].split("```", 1)[0].strip()
-                code = code_part
-        elif "```" in response_text:
-            parts = response_text.split("```", 1)
-            if len(parts) > 1:
-                code_part = parts[1].split("```", 1)[0].strip()
-                code = code_part
-
-        # Extract explanation
-        if "EXPLANATION:" in response_text:
-            expl_part = response_text.split("EXPLANATION:", 1)[1]
-            explanation = expl_part.split("TIME_COMPLEXITY:", 1)[0].strip()
-
-        # Extract complexities
-        if "TIME_COMPLEXITY:" in response_text:
-            time_part = response_text.split("TIME_COMPLEXITY:", 1)[1]
-            time_complexity = time_part.split("\n", 1)[0].strip()
-
-        if "SPACE_COMPLEXITY:" in response_text:
-            space_part = response_text.split("SPACE_COMPLEXITY:", 1)[1]
-            space_complexity = space_part.split("\n", 1)[0].strip()
-
-        result = {
-            "code": code or response_text,
-            "explanation": explanation,
-            "time_complexity": time_complexity,
-            "space_complexity": space_complexity,
-            "language": language,
-            "full_response": response_text
-        }
-
-        # Run test cases if provided
-        if test_cases and code:
-            test_results = []
-            # Note: Actual execution would require safe sandboxing
-            # For now, just return structure
-            for tc in test_cases:
-                test_results.append({
-                    "input": tc.get("input"),
-                    "expected": tc.get("expected"),
-                    "status": "pending"  # Would be "passed"/"failed" after execution
-                })
-            result["test_results"] = test_results
+        code_llm = _get_llm(MODELS["code"], 0.2, 2000)
+        response_text = _invoke_cached(code_llm, _code_messages(task, language, test_cases))
+        result, code = _parse_code(response_text, language, test_cases)
 
         # Verify if requested
         if verify and code:
-            verification = verify_code_quality(
+            result["verification"] = verify_code_quality(
                 code=code,
                 task=task,
                 language=language
             )
-            result["verification"] = verification
 
         logger.info(f"✅ Code solution generated")
         return result
@@ -265,6 +383,39 @@ SPACE_COMPLEXITY: [e.g., O(1)]
 # ANSWER VERIFIER
 # ============================================================================
 
+_VERIFY_SYSTEM = SystemMessage(content="""You are an expert answer verifier. Evaluate if the answer is correct.
+
+Respond with a JSON object:
+{"is_correct": "yes" | "no" | "partial", "confidence": 0.0-1.0, "issues": [problems, or empty], "suggestions": [improvements, or empty]}
+""")
+
+
+def _verify_messages(question: str, answer: str, explanation: Optional[str]) -> List[Any]:
+    context = f"Question: {question}\nAnswer: {answer}"
+    if explanation:
+        context += f"\nExplanation: {explanation}"
+
+    return [
+        _VERIFY_SYSTEM,
+        HumanMessage(content=context)
+    ]
+
+
+def _parse_verification(verification_text: str) -> Dict[str, Any]:
+    parsed = _json_object(verification_text)
+    is_correct = _json_text(parsed.get("is_correct"), "yes")
+
+    return {
+        "is_correct": is_correct in ["yes", "true"],
+        "correctness_level": is_correct,  # yes/no/partial
+        "confidence": _json_float(parsed.get("confidence"), 0.7),
+        "issues": _json_list(parsed.get("issues")),
+        "suggestions": _json_list(parsed.get("suggestions")),
+        "verified_by": MODELS["verify"],
+        "full_response": verification_text
+    }
+
+
 def verify_answer(
     question: str,
     answer: str,
@@ -284,74 +435,11 @@ def verify_answer(
     logger.info(f"✓ Verifying answer with gemma3:4b")
 
     try:
-        # Initialize verifier model
-        verify_llm = ChatOllama(
-            model=MODELS["verify"],
-            temperature=0.0,
-            num_predict=500
-        )
-
-        # Create verification prompt
-        system_prompt = """You are an expert answer verifier. Evaluate if the answer is correct.
-
-Respond in this format:
-IS_CORRECT: [yes/no/partial]
-CONFIDENCE: [0.0-1.0]
-ISSUES: [list any problems, or 'none']
-SUGGESTIONS: [improvements, or 'none']
-"""
-
-        context = f"Question: {question}\nAnswer: {answer}"
-        if explanation:
-            context += f"\nExplanation: {explanation}"
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=context)
-        ]
-
-        # Get verification
-        response = verify_llm.invoke(messages)
-        verification_text = response.content
-
-        # Parse verification
-        is_correct = "yes"
-        confidence = 0.7
-        issues = []
-        suggestions = []
-
-        if "IS_CORRECT:" in verification_text:
-            correct_part = verification_text.split("IS_CORRECT:", 1)[1].split("\n", 1)[0].strip().lower()
-            is_correct = correct_part
-
-        if "CONFIDENCE:" in verification_text:
-            conf_part = verification_text.split("CONFIDENCE:", 1)[1].split("\n", 1)[0].strip()
-            try:
-                confidence = float(conf_part)
-            except:
-                pass
-
-        if "ISSUES:" in verification_text:
-            issues_part = verification_text.split("ISSUES:", 1)[1].split("SUGGESTIONS:", 1)[0].strip()
-            if issues_part.lower() != "none":
-                issues = [i.strip() for i in issues_part.split("\n") if i.strip()]
-
-        if "SUGGESTIONS:" in verification_text:
-            sugg_part = verification_text.split("SUGGESTIONS:", 1)[1].strip()
-            if sugg_part.lower() != "none":
-                suggestions = [s.strip() for s in sugg_part.split("\n") if s.strip()]
-
-        result = {
-            "is_correct": is_correct in ["yes", "true"],
-            "correctness_level": is_correct,  # yes/no/partial
-            "confidence": confidence,
-            "issues": issues,
-            "suggestions": suggestions,
-            "verified_by": MODELS["verify"],
-            "full_response": verification_text
-        }
+        verify_llm = _get_llm(MODELS["verify"], 0.0, 500, "json")
+        verification_text = _invoke_cached(verify_llm, _verify_messages(question, answer, explanation))
+        result = _parse_verification(verification_text)
 
-        logger.info(f"✅ Verification complete: {is_correct} (confidence: {confidence})")
+        logger.info(f"✅ Verification complete: {result['correctness_level']} (confidence: {result['confidence']})")
         return result
 
     except Exception as e:
@@ -363,6 +451,41 @@ SUGGESTIONS: [improvements, or 'none']
         }
 
 
+_QUALITY_SYSTEM = SystemMessage(content="""You are a code review expert. Evaluate the code quality.
+
+Check for:
+- Correctness (solves the task)
+- Edge cases handled
+- Code clarity and readability
+- Potential bugs
+
+Respond with a JSON object:
+{"quality_score": 0.0-1.0, "correctness": "yes" | "no" | "partial", "issues": [bugs or problems, or empty], "suggestions": [improvements, or empty]}
+""")
+
+
+def _quality_messages(code: str, task: str, language: str) -> List[Any]:
+    context = f"Task: {task}\n\nCode ({language}):\n```{language}\n{code}\n```"
+
+    return [
+        _QUALITY_SYSTEM,
+        HumanMessage(content=context)
+    ]
+
+
+def _parse_quality(verification_text: str) -> Dict[str, Any]:
+    parsed = _json_object(verification_text)
+
+    return {
+        "quality_score": _json_float(parsed.get("quality_score"), 0.8),
+        "correctness": _json_text(parsed.get("correctness"), "yes"),
+        "issues": _json_list(parsed.get("issues")),
+        "suggestions": _json_list(parsed.get("suggestions")),
+        "verified_by": MODELS["verify"],
+        "full_response": verification_text
+    }
+
+
 def verify_code_quality(
     code: str,
     task: str,
@@ -382,72 +505,9 @@ def verify_code_quality(
     logger.info(f"✓ Verifying code quality with gemma3:4b")
 
     try:
-        verify_llm = ChatOllama(
-            model=MODELS["verify"],
-            temperature=0.0,
-            num_predict=800
-        )
-
-        system_prompt = """You are a code review expert. Evaluate the code quality.
-
-Check for:
-- Correctness (solves the task)
-- Edge cases handled
-- Code clarity and readability
-- Potential bugs
-
-Respond in this format:
-QUALITY_SCORE: [0.0-1.0]
-CORRECTNESS: [yes/no/partial]
-ISSUES: [list any bugs or problems, or 'none']
-SUGGESTIONS: [improvements, or 'none']
-"""
-
-        context = f"Task: {task}\n\nCode ({language}):\n```{language}\n{code}\n```"
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=context)
-        ]
-
-        response = verify_llm.invoke(messages)
-        verification_text = response.content
-
-        # Parse verification
-        quality_score = 0.8
-        correctness = "yes"
-        issues = []
-        suggestions = []
-
-        if "QUALITY_SCORE:" in verification_text:
-            score_part = verification_text.split("QUALITY_SCORE:", 1)[1].split("\n", 1)[0].strip()
-            try:
-                quality_score = float(score_part)
-            except:
-                pass
-
-        if "CORRECTNESS:" in verification_text:
-            correct_part = verification_text.split("CORRECTNESS:", 1)[1].split("\n", 1)[0].strip().lower()
-            correctness = correct_part
-
-        if "ISSUES:" in verification_text:
-            issues_part = verification_text.split("ISSUES:", 1)[1].split("SUGGESTIONS:", 1)[0].strip()
-            if issues_part.lower() != "none":
-                issues = [i.strip() for i in issues_part.split("\n") if i.strip()]
-
-        if "SUGGESTIONS:" in verification_text:
-            sugg_part = verification_text.split("SUGGESTIONS:", 1)[1].strip()
-            if sugg_part.lower() != "none":
-                suggestions = [s.strip() for s in sugg_part.split("\n") if s.strip()]
-
-        return {
-            "quality_score": quality_score,
-            "correctness": correctness,
-            "issues": issues,
-            "suggestions": suggestions,
-            "verified_by": MODELS["verify"],
-            "full_response": verification_text
-        }
+        verify_llm = _get_llm(MODELS["verify"], 0.0, 800, "json")
+        verification_text = _invoke_cached(verify_llm, _quality_messages(code, task, language))
+        return _parse_quality(verification_text)
 
     except Exception as e:
         logger.error(f"❌ Code quality verification failed: {e}")
@@ -461,6 +521,62 @@ SUGGESTIONS: [improvements, or 'none']
 # MODEL ROUTER
 # ============================================================================
 
+_MATH_KEYWORDS = ("solve", "calculate", "equation", "derivative", "integral", "∫", "∂", "x=", "y=")
+_CODE_KEYWORDS = ("write", "code", "function", "implement", "debug", "```", "class", "def ", "const ")
+
+# One alternation per domain so each check is a single C-level scan; plain
+# substring matches (no word boundaries), same as `kw in query.lower()`
+_MATH_KEYWORDS_RE = re.compile("|".join(map(re.escape, _MATH_KEYWORDS)), re.IGNORECASE)
+_CODE_KEYWORDS_RE = re.compile("|".join(map(re.escape, _CODE_KEYWORDS)), re.IGNORECASE)
+
+
+# Possible routing decisions; route_query hands out copies
+_ROUTES: Dict[Optional[str], Dict[str, Any]] = {
+    "solve_math": {
+        "primary_model": MODELS["math"],
+        "verification_model": MODELS["verify"],
+        "strategy": "solve_then_verify",
+        "tool": "solve_math"
+    },
+    "solve_code": {
+        "primary_model": MODELS["code"],
+        "verification_model": MODELS["verify"],
+        "strategy": "solve_then_verify",
+        "tool": "solve_code"
+    },
+    # Simple questions - no specialist needed
+    None: {
+        "primary_model": MODELS["main"],
+        "verification_model": None,
+        "strategy": "direct_answer",
+        "tool": None
+    }
+}
+
+
+@lru_cache(maxsize=64)
+def _route_candidates(intent: str, domain: str) -> Tuple[Tuple["re.Pattern[str]", str], ...]:
+    """(keyword pattern, tool) checks that apply to an (intent, domain) pair, in order"""
+    candidates = []
+
+    # Math-related queries
+    if domain == "mathematics" or intent == "solving_problem":
+        candidates.append((_MATH_KEYWORDS_RE, "solve_math"))
+
+    # Code-related queries
+    if domain == "programming" or intent in ("solving_problem", "debugging_code"):
+        candidates.append((_CODE_KEYWORDS_RE, "solve_code"))
+
+    return tuple(candidates)
+
+
+def _route_tool(query: str, intent: str, domain: str) -> Optional[str]:
+    for pattern, tool in _route_candidates(intent, domain):
+        if pattern.search(query):
+            return tool
+    return None
+
+
 def route_query(query: str, intent: str = "general", domain: str = "general") -> Dict[str, Any]:
     """
     Determine which specialist model to use for a query.
@@ -473,33 +589,4 @@ def route_query(query: str, intent: str = "general", domain: str = "general") ->
     Returns:
         Routing decision with model selection
     """
-    # Math-related queries
-    if domain == "mathematics" or intent == "solving_problem":
-        # Check if it's a math problem
-        math_keywords = ["solve", "calculate", "equation", "derivative", "integral", "∫", "∂", "x=", "y="]
-        if any(kw in query.lower() for kw in math_keywords):
-            return {
-                "primary_model": MODELS["math"],
-                "verification_model": MODELS["verify"],
-                "strategy": "solve_then_verify",
-                "tool": "solve_math"
-            }
-
-    # Code-related queries
-    if domain == "programming" or intent in ["solving_problem", "debugging_code"]:
-        code_keywords = ["write", "code", "function", "implement", "debug", "```", "class", "def ", "const "]
-        if any(kw in query.lower() for kw in code_keywords):
-            return {
-                "primary_model": MODELS["code"],
-                "verification_model": MODELS["verify"],
-                "strategy": "solve_then_verify",
-                "tool": "solve_code"
-            }
-
-    # Simple questions - no specialist needed
-    return {
-        "primary_model": MODELS["main"],
-        "verification_model": None,
-        "strategy": "direct_answer",
-        "tool": None
-    }
+    return dict(_ROUTES[_route_tool(query, intent, domain)])
@@ -0,0 +1,163 @@
+-- ============================================================================
+-- ROADMAP PROGRESS RPCS
+-- Server-side helpers used by roadmap_router.py to collapse multi-step
+-- milestone progress updates into single round-trips, plus the indexes
+-- backing its hot filter patterns.
+-- Safe to re-run (CREATE OR REPLACE / IF NOT EXISTS).
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. UNLOCK MILESTONE IF LOCKED
+-- Inserts a 'not_started' progress row, or flips an existing 'locked' row to
+-- 'not_started'. Returns the row status only when something was unlocked;
+-- an empty result means the milestone was already unlocked.
+-- ============================================================================
+CREATE OR REPLACE FUNCTION unlock_if_locked(
+    p_user_id UUID,
+    p_roadmap_id UUID,
+    p_phase_id VARCHAR,
+    p_milestone_id VARCHAR,
+    p_milestone_title VARCHAR DEFAULT NULL,
+    p_milestone_type VARCHAR DEFAULT NULL
+)
+RETURNS TABLE (milestone_status VARCHAR) AS $$
+    INSERT INTO milestone_progress AS mp (
+        user_id,
+        roadmap_id,
+        phase_id,
+        milestone_id,
+        milestone_title,
+        milestone_type,
+        status,
+        progress_percentage
+    )
+    VALUES (
+        p_user_id,
+        p_roadmap_id,
+        p_phase_id,
+        p_milestone_id,
+        p_milestone_title,
+        p_milestone_type,
+        'not_started',
+        0.0
+    )
+    ON CONFLICT (user_id, roadmap_id, phase_id, milestone_id)
+    DO UPDATE SET
+        status = 'not_started',
+        milestone_title = EXCLUDED.milestone_title,
+        milestone_type = EXCLUDED.milestone_type,
+        progress_percentage = 0.0
+    WHERE mp.status = 'locked'
+    RETURNING mp.status;
+$$ LANGUAGE sql SECURITY DEFINER;
+
+COMMENT ON FUNCTION unlock_if_locked IS 'Conditionally unlock a milestone in one statement (no status pre-read)';
+
+
+-- ============================================================================
+-- 2. UNLOCK AND ADVANCE
+-- unlock_if_locked() plus moving the roadmap's current phase/milestone
+-- pointer, in one transaction. Same return contract as unlock_if_locked().
+-- ============================================================================
+CREATE OR REPLACE FUNCTION unlock_and_advance(
+    p_user_id UUID,
+    p_roadmap_id UUID,
+    p_phase_id VARCHAR,
+    p_milestone_id VARCHAR,
+    p_milestone_title VARCHAR DEFAULT NULL,
+    p_milestone_type VARCHAR DEFAULT NULL
+)
+RETURNS TABLE (milestone_status VARCHAR) AS $$
+DECLARE
+    v_status VARCHAR;
+BEGIN
+    SELECT u.milestone_status INTO v_status
+    FROM unlock_if_locked(
+        p_user_id, p_roadmap_id, p_phase_id, p_milestone_id, p_milestone_title, p_milestone_type
+    ) AS u;
+
+    IF v_status IS NULL THEN
+        RETURN;
+    END IF;
+
+    UPDATE learning_roadmaps
+    SET
+        current_phase_id = p_phase_id,
+        current_milestone_id = p_milestone_id
+    WHERE id = p_roadmap_id;
+
+    milestone_status := v_status;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+COMMENT ON FUNCTION unlock_and_advance IS 'Atomically unlock the next milestone and advance the roadmap pointer';
+
+
+-- ============================================================================
+-- 3. INITIALIZE MILESTONE PROGRESS
+-- Creates one progress row per milestone straight from the stored
+-- roadmap_data, so the API doesn't have to ship the roadmap back as JSON.
+-- Returns the number of rows inserted.
+-- ============================================================================
+CREATE OR REPLACE FUNCTION initialize_milestone_progress(
+    p_roadmap_id UUID,
+    p_user_id UUID
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_inserted INTEGER;
+BEGIN
+    INSERT INTO milestone_progress (
+        user_id,
+        roadmap_id,
+        phase_id,
+        milestone_id,
+        milestone_title,
+        milestone_type,
+        status,
+        progress_percentage
+    )
+    SELECT
+        p_user_id,
+        r.id,
+        phase->>'id',
+        milestone->>'id',
+        milestone->>'title',
+        milestone->>'type',
+        COALESCE(milestone->>'status', 'not_started'),
+        0.0
+    FROM learning_roadmaps r,
+        jsonb_array_elements(COALESCE(r.roadmap_data->'phases', '[]'::jsonb)) AS phase,
+        jsonb_array_elements(COALESCE(phase->'milestones', '[]'::jsonb)) AS milestone
+    WHERE r.id = p_roadmap_id
+      AND r.user_id = p_user_id
+    ON CONFLICT (user_id, roadmap_id, phase_id, milestone_id) DO NOTHING;
+
+    GET DIAGNOSTICS v_inserted = ROW_COUNT;
+    RETURN v_inserted;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+COMMENT ON FUNCTION initialize_milestone_progress IS 'Create milestone_progress rows from learning_roadmaps.roadmap_data server-side';
+
+
+-- ============================================================================
+-- 4. INDEXES
+-- ============================================================================
+
+-- Per-milestone lookups: (user_id, roadmap_id, milestone_id)
+CREATE INDEX IF NOT EXISTS milestone_progress_user_roadmap_milestone_idx
+    ON milestone_progress(user_id, roadmap_id, milestone_id);
+
+-- Progress recalculation reads only status for a roadmap (index-only scan)
+CREATE INDEX IF NOT EXISTS milestone_progress_roadmap_status_idx
+    ON milestone_progress(roadmap_id) INCLUDE (status);
+
+-- chat_session_id fallback in _emit_progress_chat_event / generate_roadmap
+CREATE INDEX IF NOT EXISTS chat_sessions_conversation_user_idx
+    ON chat_sessions(conversation_id, user_id);
+
+COMMIT;
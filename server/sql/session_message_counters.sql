@@ -0,0 +1,95 @@
+-- ============================================================================
+-- SESSION MESSAGE COUNTERS
+-- Purpose: keep per-type message counters and first/last message timestamps
+-- on chat_sessions so SessionManager.get_session_statistics can read a single
+-- row instead of scanning chat_messages.
+-- Requires: chat_roadmap_integration_enhancement.sql (message_count column and
+-- update_session_message_count trigger).
+-- Safe to re-run.
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. COUNTER COLUMNS
+-- ============================================================================
+
+ALTER TABLE public.chat_sessions
+  ADD COLUMN IF NOT EXISTS user_message_count INTEGER DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS assistant_message_count INTEGER DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS roadmap_trigger_count INTEGER DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS quiz_trigger_count INTEGER DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS milestone_update_count INTEGER DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS first_message_at TIMESTAMPTZ,
+  ADD COLUMN IF NOT EXISTS last_message_at TIMESTAMPTZ;
+
+-- ============================================================================
+-- 2. TRIGGER FUNCTION
+-- Extends update_session_message_count() to maintain the new counters.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.update_session_message_count()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE public.chat_sessions
+    SET message_count = COALESCE(message_count, 0) + 1,
+        user_message_count = COALESCE(user_message_count, 0)
+          + CASE WHEN NEW.message_type IN ('user', 'user_message') THEN 1 ELSE 0 END,
+        assistant_message_count = COALESCE(assistant_message_count, 0)
+          + CASE WHEN NEW.message_type IN ('assistant', 'assistant_message') THEN 1 ELSE 0 END,
+        roadmap_trigger_count = COALESCE(roadmap_trigger_count, 0)
+          + CASE WHEN NEW.message_type = 'roadmap_trigger' THEN 1 ELSE 0 END,
+        quiz_trigger_count = COALESCE(quiz_trigger_count, 0)
+          + CASE WHEN NEW.message_type = 'quiz_trigger' THEN 1 ELSE 0 END,
+        milestone_update_count = COALESCE(milestone_update_count, 0)
+          + CASE WHEN NEW.message_type = 'milestone_update' THEN 1 ELSE 0 END,
+        first_message_at = LEAST(first_message_at, NEW.created_at),
+        last_message_at = GREATEST(last_message_at, NEW.created_at),
+        updated_at = NOW()
+    WHERE id = NEW.session_id;
+  END IF;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_session_message_count_trigger ON public.chat_messages;
+
+CREATE TRIGGER update_session_message_count_trigger
+  AFTER INSERT ON public.chat_messages
+  FOR EACH ROW
+  EXECUTE FUNCTION public.update_session_message_count();
+
+COMMENT ON FUNCTION public.update_session_message_count IS 'Maintains chat_sessions message counters and first/last message timestamps';
+
+-- ============================================================================
+-- 3. BACKFILL
+-- ============================================================================
+
+UPDATE public.chat_sessions s
+SET message_count = m.total_messages,
+    user_message_count = m.user_messages,
+    assistant_message_count = m.assistant_messages,
+    roadmap_trigger_count = m.roadmap_triggers,
+    quiz_trigger_count = m.quiz_triggers,
+    milestone_update_count = m.milestone_updates,
+    first_message_at = m.first_message_at,
+    last_message_at = m.last_message_at
+FROM (
+  SELECT
+    session_id,
+    COUNT(*) AS total_messages,
+    COUNT(*) FILTER (WHERE message_type IN ('user', 'user_message')) AS user_messages,
+    COUNT(*) FILTER (WHERE message_type IN ('assistant', 'assistant_message')) AS assistant_messages,
+    COUNT(*) FILTER (WHERE message_type = 'roadmap_trigger') AS roadmap_triggers,
+    COUNT(*) FILTER (WHERE message_type = 'quiz_trigger') AS quiz_triggers,
+    COUNT(*) FILTER (WHERE message_type = 'milestone_update') AS milestone_updates,
+    MIN(created_at) AS first_message_at,
+    MAX(created_at) AS last_message_at
+  FROM public.chat_messages
+  GROUP BY session_id
+) m
+WHERE s.id = m.session_id;
+
+COMMIT;
@@ -0,0 +1,184 @@
+-- ============================================================================
+-- TOPIC CATALOG
+-- Server-side aggregates used by topic_router.py so its read endpoints ship
+-- only the rows they need instead of post-processing whole tables in Python,
+-- plus the indexes backing its progress lookups.
+-- Safe to re-run (CREATE OR REPLACE / IF NOT EXISTS).
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. CATEGORY COUNTS
+-- One row per category of active topics; backs GET /api/topics/categories/list.
+-- ============================================================================
+CREATE OR REPLACE VIEW topic_category_counts AS
+SELECT
+    category AS name,
+    COUNT(*)::INT AS count
+FROM topics
+WHERE is_active
+GROUP BY category
+ORDER BY category;
+
+COMMENT ON VIEW topic_category_counts IS 'Active topic count per category';
+
+
+-- ============================================================================
+-- 2. PROGRESS UPSERT SUPPORT
+-- start_topic_session upserts on (user_id, topic_id) and relies on these
+-- defaults for freshly inserted rows so resuming never resets its counters.
+-- The old select-then-insert start could race into duplicate rows, which
+-- would make the unique constraint fail; keep one row per (user, topic):
+-- a completed one first, then the most lessons done, then the latest activity.
+-- ============================================================================
+ALTER TABLE progress ALTER COLUMN score SET DEFAULT 0.0;
+ALTER TABLE progress ALTER COLUMN completed_lessons SET DEFAULT 0;
+ALTER TABLE progress ALTER COLUMN total_lessons SET DEFAULT 10;
+
+DELETE FROM progress
+WHERE id IN (
+    SELECT id
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id, topic_id
+            ORDER BY (status = 'completed') DESC NULLS LAST,
+                     completed_lessons DESC NULLS LAST,
+                     last_activity DESC NULLS LAST,
+                     id
+        ) AS rank
+        FROM progress
+    ) ranked
+    WHERE rank > 1
+);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'progress_user_topic_key'
+    ) THEN
+        ALTER TABLE progress
+            ADD CONSTRAINT progress_user_topic_key UNIQUE (user_id, topic_id);
+    END IF;
+END $$;
+
+-- ============================================================================
+-- 3. START TOPIC SESSION
+-- Upserts the caller's progress row to 'in_progress' and opens a chat session
+-- for the topic in one round-trip. Returns the new chat session id.
+-- p_started_at (naive UTC, as sent by the API) stamps last_activity so it
+-- matches the session metadata; defaults to NOW().
+-- ============================================================================
+CREATE OR REPLACE FUNCTION start_topic_session(
+    p_user_id UUID,
+    p_topic_id UUID,
+    p_title VARCHAR,
+    p_metadata JSONB DEFAULT '{}'::JSONB,
+    p_started_at TIMESTAMP DEFAULT NULL
+)
+RETURNS UUID AS $$
+DECLARE
+    v_session_id UUID;
+BEGIN
+    INSERT INTO progress (user_id, topic_id, status, last_activity)
+    VALUES (p_user_id, p_topic_id, 'in_progress', COALESCE(p_started_at, NOW()))
+    ON CONFLICT (user_id, topic_id) DO UPDATE
+    SET status = 'in_progress',
+        last_activity = EXCLUDED.last_activity;
+
+    INSERT INTO chat_sessions (user_id, topic_id, title, metadata)
+    VALUES (p_user_id, p_topic_id, p_title, p_metadata)
+    RETURNING id INTO v_session_id;
+
+    RETURN v_session_id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION start_topic_session IS 'Mark a topic in progress and open its chat session';
+
+-- ============================================================================
+-- 4. PREREQUISITE LOCKS
+-- Topics are locked while any direct prerequisite is not completed, the same
+-- rule get_topic_detail and start_topic apply, read live from
+-- topics.prerequisites. check_topic_prerequisites.py reports prerequisite
+-- cycles.
+-- ============================================================================
+
+-- ============================================================================
+-- 5. LIST USER TOPICS
+-- One page of active topics with the caller's status, progress percentage
+-- and lock flag (any direct prerequisite not completed) computed in the
+-- database.
+-- Ordered by title with id as the tiebreaker and keyset-paginated on that
+-- pair: p_cursor is the id of the last topic of the previous page. A NULL
+-- p_limit returns every matching topic; NULL filters are ignored. Returns a
+-- JSON array of objects in the shape of topic_router.TopicResponse.
+-- ============================================================================
+CREATE OR REPLACE FUNCTION list_user_topics(
+    p_user_id UUID,
+    p_category VARCHAR DEFAULT NULL,
+    p_difficulty VARCHAR DEFAULT NULL,
+    p_search VARCHAR DEFAULT NULL,
+    p_cursor UUID DEFAULT NULL,
+    p_limit INT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+    WITH completed AS (
+        SELECT COALESCE(ARRAY_AGG(topic_id::TEXT), '{}') AS ids
+        FROM progress
+        WHERE user_id = p_user_id
+          AND status = 'completed'
+    ),
+    page AS (
+        SELECT t.title, t.id, jsonb_build_object(
+            'id', t.id,
+            'title', t.title,
+            'description', t.description,
+            'category', t.category,
+            'difficulty_level', t.difficulty_level,
+            'estimated_hours', COALESCE(t.estimated_hours, 5),
+            'prerequisites', COALESCE(to_jsonb(t.prerequisites), '[]'::JSONB),
+            'learning_objectives', COALESCE(to_jsonb(t.learning_objectives), '[]'::JSONB),
+            'is_locked', EXISTS (
+                SELECT 1
+                FROM unnest(t.prerequisites) AS pre(id)
+                WHERE NOT pre.id::TEXT = ANY(c.ids)
+            ),
+            'progress_percentage', COALESCE(ROUND(
+                COALESCE(p.completed_lessons, 0)::NUMERIC
+                / NULLIF(COALESCE(p.total_lessons, 10), 0) * 100, 2), 0),
+            'status', COALESCE(p.status, 'not_started')
+        ) AS topic
+        FROM topics t
+        CROSS JOIN completed c
+        LEFT JOIN progress p
+            ON p.user_id = p_user_id
+           AND p.topic_id = t.id
+        WHERE t.is_active
+          AND (p_category IS NULL OR t.category = p_category)
+          AND (p_difficulty IS NULL OR t.difficulty_level = p_difficulty)
+          AND (p_search IS NULL OR t.title ILIKE '%' || p_search || '%')
+          AND (p_cursor IS NULL OR (t.title, t.id) > (
+                SELECT prev.title, prev.id FROM topics prev WHERE prev.id = p_cursor
+              ))
+        ORDER BY t.title, t.id
+        LIMIT p_limit
+    )
+    SELECT COALESCE(jsonb_agg(topic ORDER BY title, id), '[]'::JSONB)
+    FROM page;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION list_user_topics IS 'Page of active topics with per-user status, progress and lock flag';
+
+-- ============================================================================
+-- 6. INDEXES
+-- ============================================================================
+
+-- Per-user progress reads in get_all_topics / get_topic_detail / start_topic
+-- select only these columns, so they can be served by an index-only scan
+CREATE INDEX IF NOT EXISTS progress_user_topic_covering_idx
+    ON progress(user_id, topic_id) INCLUDE (status, completed_lessons, total_lessons);
+
+ANALYZE progress;
+
+COMMIT;
@@ -5,7 +5,8 @@ Start script for the Porte Hobe AI FastAPI server
 
 import sys
 import os
-import subprocess
+
+import uvicorn
 
 def main():
     """Start the FastAPI server"""
@@ -15,19 +16,25 @@ def main():
     server_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(server_dir)
     
+    # Auto-reload for development; pass --no-reload to run multiple workers instead
+    reload = "--no-reload" not in sys.argv[1:]
+    
     try:
-        # Run uvicorn with the main app
-        subprocess.run([
-            sys.executable, "-m", "uvicorn",
+        # Run uvicorn in-process; loop/http "auto" pick uvloop and httptools
+        # (installed with uvicorn[standard]) when available
+        uvicorn.run(
             "main:app",
-            "--host", "0.0.0.0",
-            "--port", "8000",
-            "--reload",
-            "--reload-exclude", ".venv"
-        ], check=True)
+            host="0.0.0.0",
+            port=8000,
+            reload=reload,
+            reload_excludes=[".venv"] if reload else None,
+            workers=None if reload else max(1, (os.cpu_count() or 2) // 2),
+            loop="auto",
+            http="auto"
+        )
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         print(f"❌ Error starting server: {e}")
         sys.exit(1)
 
@@ -0,0 +1,60 @@
+"""
+Test script for SessionManager write coalescing
+
+Checks that one rejected message in a bulk insert doesn't fail the others.
+Run with: python test_session_manager.py
+"""
+import asyncio
+import logging
+from session_manager import SessionManager
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class ForeignKeyViolation(Exception):
+    """Stand-in for asyncpg.ForeignKeyViolationError"""
+    sqlstate = "23503"
+
+
+class FakePool:
+    """Placeholder so save_messages_bulk takes the Postgres path"""
+
+
+async def _save_with_one_bad_message():
+    manager = SessionManager(None, pool=FakePool())
+    inserts = []
+
+    async def insert_messages(messages):
+        inserts.append(len(messages))
+        if any(message["session_id"] == "missing-session" for message in messages):
+            raise ForeignKeyViolation("chat_messages_session_id_fkey")
+        return [{**message, "id": f"msg-{message['content']}"} for message in messages]
+
+    manager._insert_messages_pg = insert_messages
+
+    results = await asyncio.gather(
+        manager.save_message("session-1", "user", "first"),
+        manager.save_message("missing-session", "user", "second"),
+        manager.save_message("session-1", "assistant", "third"),
+        return_exceptions=True
+    )
+    return results, inserts
+
+
+def test_bulk_failure_falls_back_to_single_inserts():
+    """The two valid messages save; only the bad one gets the error"""
+    results, inserts = asyncio.run(_save_with_one_bad_message())
+
+    first, second, third = results
+    assert first["id"] == "msg-first"
+    assert isinstance(second, ForeignKeyViolation)
+    assert third["id"] == "msg-third"
+    # One bulk attempt, not retried, then one insert per message
+    assert inserts == [3, 1, 1, 1]
+
+
+if __name__ == "__main__":
+    print("\n🚀 Starting Session Manager Tests...\n")
+    test_bulk_failure_falls_back_to_single_inserts()
+    print("✅ Rejected message failed alone; the others were saved")
@@ -0,0 +1,45 @@
+"""
+Test script for Specialist Models
+
+Checks that verifier JSON replies with missing or badly typed fields fall
+back to defaults instead of failing the whole verification.
+Run with: python test_specialist_models.py
+"""
+import json
+from specialist_models import _parse_verification, _parse_quality
+
+
+def test_parse_verification_defaults():
+    """Missing is_correct and an unparseable confidence use the defaults"""
+    reply = json.dumps({"confidence": "high", "issues": "None"})
+    result = _parse_verification(reply)
+
+    assert result["is_correct"] is True
+    assert result["correctness_level"] == "yes"
+    assert result["confidence"] == 0.7
+    assert result["issues"] == []
+
+
+def test_parse_verification_typed_fields():
+    """Booleans and numeric strings from the model are accepted"""
+    result = _parse_verification(json.dumps({"is_correct": False, "confidence": "0.4"}))
+
+    assert result["is_correct"] is False
+    assert result["confidence"] == 0.4
+
+
+def test_parse_quality_defaults():
+    """Missing correctness and a null quality_score use the defaults"""
+    result = _parse_quality(json.dumps({"quality_score": None, "suggestions": ["add tests"]}))
+
+    assert result["quality_score"] == 0.8
+    assert result["correctness"] == "yes"
+    assert result["suggestions"] == ["add tests"]
+
+
+if __name__ == "__main__":
+    print("\n🚀 Starting Specialist Models Tests...\n")
+    test_parse_verification_defaults()
+    test_parse_verification_typed_fields()
+    test_parse_quality_defaults()
+    print("✅ Verifier replies with missing or bad fields parsed with defaults")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from typing import Any, Dict
 from dotenv import load_dotenv
 
@@ -45,7 +46,8 @@ class TavilyWebSearchTool:
 
     def invoke(self, input: Dict[str, Any] | str) -> Any:
         if isinstance(input, dict):
-            payload = {k: v for k, v in input.items()}
+            # Passed through as-is; TavilySearch only reads it
+            payload = input
             query = (payload.get("query") or payload.get("input") or "").strip()
         else:
             query = str(input).strip()
@@ -60,9 +62,11 @@ class TavilyWebSearchTool:
         return res
 
 
+@lru_cache(maxsize=1)
 def create_search_tool() -> TavilyWebSearchTool:
     """Create the Tavily-based web search tool.
 
-    Requires TAVILY_API_KEY and langchain-tavily installed.
+    Requires TAVILY_API_KEY and langchain-tavily installed. The tool is
+    built once per process and shared by every caller.
     """
     return TavilyWebSearchTool(max_results=5)
@@ -3,19 +3,102 @@ Topic Router
 Manages learning topics, prerequisites, and topic sessions
 """
 
+import asyncio
+import inspect
 import logging
-from typing import List, Optional
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 
+try:
+    import orjson  # optional: faster serialization of topic payloads
+except ImportError:
+    orjson = None
+
 from auth import get_current_user
-from config import get_supabase_client
+from config import get_async_supabase_client, get_supabase_client
 
 logger = logging.getLogger("topic_router")
 
-router = APIRouter(prefix="/api/topics", tags=["topics"])
+_JSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+router = APIRouter(
+    prefix="/api/topics",
+    tags=["topics"],
+    default_response_class=_JSONResponse
+)
+
+
+async def _sb_exec(query):
+    """Execute a supabase-py query builder without blocking the event loop.
+
+    Builders from the async client are awaited directly; sync builders (the
+    fallback client) run `.execute()` in a worker thread.
+    """
+    if inspect.iscoroutinefunction(query.execute):
+        return await query.execute()
+    return await asyncio.to_thread(query.execute)
+
+
+async def _get_client():
+    """Async Supabase client, or the sync one when async is unavailable"""
+    return await get_async_supabase_client() or get_supabase_client()
+
+
+# Topic rows are seeded by SQL and never written through the API, so they are
+# cached per process for a few minutes instead of re-fetched on every request
+_TOPIC_CACHE_TTL = 300.0
+_TOPIC_CACHE_SIZE = 4096
+_topic_cache: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+# Columns read by get_topic_detail and start_topic; skips timestamps and any
+# other wide columns neither endpoint uses
+_TOPIC_COLUMNS = (
+    'id, title, description, category, difficulty_level, estimated_hours, '
+    'prerequisites, learning_objectives, content_structure, resources'
+)
+
+
+async def _get_topic(supabase, topic_id: str) -> Optional[dict]:
+    """Fetch a topic row by id, served from the in-process cache when fresh"""
+    cached = _topic_cache.get(topic_id)
+    if cached is not None and time.monotonic() - cached[0] < _TOPIC_CACHE_TTL:
+        _topic_cache.move_to_end(topic_id)
+        return cached[1]
+
+    result = await _sb_exec(
+        supabase.table('topics')
+        .select(_TOPIC_COLUMNS)
+        .eq('id', topic_id)
+        .single()
+    )
+    if result.data:
+        _topic_cache[topic_id] = (time.monotonic(), result.data)
+        _topic_cache.move_to_end(topic_id)
+        if len(_topic_cache) > _TOPIC_CACHE_SIZE:
+            _topic_cache.popitem(last=False)
+    return result.data
+
+
+# The category histogram is the same for every user; recompute it at most
+# once a minute rather than scanning the topics table per request
+_CATEGORIES_CACHE_TTL = 60.0
+_categories_cache: Optional[Tuple[float, dict]] = None
+
+
+def invalidate_topic(topic_id: Optional[str] = None) -> None:
+    """Drop one cached topic row (or all of them) after topics are edited"""
+    global _categories_cache
+    if topic_id is None:
+        _topic_cache.clear()
+        _categories_cache = None
+    else:
+        _topic_cache.pop(topic_id, None)
 
 
 class TopicResponse(BaseModel):
@@ -47,6 +130,11 @@ class TopicDetail(BaseModel):
     user_progress: Optional[dict]
 
 
+class TopicListResponse(BaseModel):
+    topics: List[TopicResponse]
+    next_cursor: Optional[str]
+
+
 class StartTopicResponse(BaseModel):
     topic_id: str
     session_id: str
@@ -54,85 +142,46 @@ class StartTopicResponse(BaseModel):
     next_lesson: Optional[dict]
 
 
-@router.get("/", response_model=List[TopicResponse])
+# The RPC already returns TopicListResponse-shaped JSON, so it is sent as-is;
+# the model only documents the response
+@router.get("/", response_model=None, responses={200: {"model": TopicListResponse}})
 async def get_all_topics(
     category: Optional[str] = None,
     difficulty: Optional[str] = None,
     search: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
     user: dict = Depends(get_current_user)
 ):
     """
-    Get all available topics with user progress
+    Get available topics with user progress, ordered by title
     
     - **category**: Filter by category (math, science, programming, etc.)
     - **difficulty**: Filter by difficulty (beginner, intermediate, advanced)
     - **search**: Search in title and description
+    - **limit**: Page size; omit to get every topic in one response
+    - **cursor**: `next_cursor` from the previous page; omit for the first page
     """
-    supabase = get_supabase_client()
+    supabase = await _get_client()
     
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
     try:
-        # Get topics
-        query = supabase.table('topics').select('*').eq('is_active', True)
-        
-        if category:
-            query = query.eq('category', category)
-        
-        if difficulty:
-            query = query.eq('difficulty_level', difficulty)
-        
-        if search:
-            query = query.ilike('title', f'%{search}%')
-        
-        topics_result = query.execute()
-        
-        # Get user progress for all topics
-        progress_result = supabase.table('progress')\
-            .select('topic_id, status, completed_lessons, total_lessons')\
-            .eq('user_id', user['user_id'])\
-            .execute()
-        
-        progress_map = {p['topic_id']: p for p in progress_result.data}
-        
-        # Build response
-        topics_list = []
-        for topic in topics_result.data:
-            topic_id = topic['id']
-            progress = progress_map.get(topic_id, {})
-            
-            # Check if topic is locked (prerequisites not met)
-            prerequisites = topic.get('prerequisites', [])
-            is_locked = False
-            
-            if prerequisites:
-                for prereq_id in prerequisites:
-                    prereq_progress = progress_map.get(prereq_id, {})
-                    if prereq_progress.get('status') != 'completed':
-                        is_locked = True
-                        break
-            
-            # Calculate progress percentage
-            completed = progress.get('completed_lessons', 0)
-            total = progress.get('total_lessons', 10)
-            progress_percentage = round((completed / total * 100) if total > 0 else 0, 2)
-            
-            topics_list.append(TopicResponse(
-                id=topic_id,
-                title=topic['title'],
-                description=topic['description'],
-                category=topic['category'],
-                difficulty_level=topic['difficulty_level'],
-                estimated_hours=topic.get('estimated_hours', 5),
-                prerequisites=prerequisites,
-                learning_objectives=topic.get('learning_objectives', []),
-                is_locked=is_locked,
-                progress_percentage=progress_percentage,
-                status=progress.get('status', 'not_started')
-            ))
-        
-        return topics_list
+        # Lock flags and progress are computed server-side by list_user_topics
+        # (see sql/topic_catalog.sql)
+        result = await _sb_exec(supabase.rpc('list_user_topics', {
+            'p_user_id': user['user_id'],
+            'p_category': category,
+            'p_difficulty': difficulty,
+            'p_search': search,
+            'p_cursor': cursor,
+            'p_limit': limit
+        }))
+        topics_list = result.data or []
+        
+        next_cursor = topics_list[-1]['id'] if len(topics_list) == limit else None
+        return _JSONResponse({'topics': topics_list, 'next_cursor': next_cursor})
         
     except Exception as e:
         logger.error(f"❌ Failed to get topics: {e}")
@@ -147,31 +196,26 @@ async def get_topic_detail(
     """
     Get detailed information about a specific topic
     """
-    supabase = get_supabase_client()
+    supabase = await _get_client()
     
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
     try:
-        # Get topic
-        topic_result = supabase.table('topics')\
-            .select('*')\
-            .eq('id', topic_id)\
-            .single()\
-            .execute()
+        # Get topic and user progress (independent, so run concurrently)
+        topic, progress_result = await asyncio.gather(
+            _get_topic(supabase, topic_id),
+            _sb_exec(
+                supabase.table('progress')
+                .select('*')
+                .eq('user_id', user['user_id'])
+                .eq('topic_id', topic_id)
+            )
+        )
         
-        if not topic_result.data:
+        if not topic:
             raise HTTPException(status_code=404, detail="Topic not found")
         
-        topic = topic_result.data
-        
-        # Get user progress
-        progress_result = supabase.table('progress')\
-            .select('*')\
-            .eq('user_id', user['user_id'])\
-            .eq('topic_id', topic_id)\
-            .execute()
-        
         user_progress = progress_result.data[0] if progress_result.data else None
         
         # Check prerequisites
@@ -179,18 +223,16 @@ async def get_topic_detail(
         is_locked = False
         
         if prerequisites:
-            progress_all = supabase.table('progress')\
-                .select('topic_id, status')\
-                .eq('user_id', user['user_id'])\
-                .in_('topic_id', prerequisites)\
-                .execute()
-            
-            progress_map = {p['topic_id']: p for p in progress_all.data}
+            completed_result = await _sb_exec(
+                supabase.table('progress')
+                .select('topic_id')
+                .eq('user_id', user['user_id'])
+                .eq('status', 'completed')
+                .in_('topic_id', prerequisites)
+            )
             
-            for prereq_id in prerequisites:
-                if prereq_id not in progress_map or progress_map[prereq_id]['status'] != 'completed':
-                    is_locked = True
-                    break
+            completed_ids = {p['topic_id'] for p in completed_result.data}
+            is_locked = not completed_ids.issuperset(prerequisites)
         
         return TopicDetail(
             id=topic['id'],
@@ -223,32 +265,30 @@ async def start_topic(
     Initialize a learning session for a topic
     Creates progress record and returns first lesson info
     """
-    supabase = get_supabase_client()
+    supabase = await _get_client()
     
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
     try:
-        # Check if topic exists
-        topic = supabase.table('topics')\
-            .select('*')\
-            .eq('id', topic_id)\
-            .single()\
-            .execute()
+        topic = await _get_topic(supabase, topic_id)
         
-        if not topic.data:
+        # Check if topic exists
+        if not topic:
             raise HTTPException(status_code=404, detail="Topic not found")
         
         # Check prerequisites
-        prerequisites = topic.data.get('prerequisites', [])
+        prerequisites = topic.get('prerequisites', [])
         if prerequisites:
-            progress_all = supabase.table('progress')\
-                .select('topic_id, status')\
-                .eq('user_id', user['user_id'])\
-                .in_('topic_id', prerequisites)\
-                .execute()
+            completed_result = await _sb_exec(
+                supabase.table('progress')
+                .select('topic_id')
+                .eq('user_id', user['user_id'])
+                .eq('status', 'completed')
+                .in_('topic_id', prerequisites)
+            )
             
-            completed_prereqs = {p['topic_id'] for p in progress_all.data if p['status'] == 'completed'}
+            completed_prereqs = {p['topic_id'] for p in completed_result.data}
             missing_prereqs = set(prerequisites) - completed_prereqs
             
             if missing_prereqs:
@@ -257,59 +297,38 @@ async def start_topic(
                     detail=f"Prerequisites not met. Complete these topics first: {list(missing_prereqs)}"
                 )
         
-        # Check existing progress
-        existing_progress = supabase.table('progress')\
-            .select('*')\
-            .eq('user_id', user['user_id'])\
-            .eq('topic_id', topic_id)\
-            .execute()
-        
-        if not existing_progress.data:
-            # Create new progress
-            new_progress = {
-                'user_id': user['user_id'],
-                'topic_id': topic_id,
-                'score': 0.0,
-                'completed_lessons': 0,
-                'total_lessons': 10,
-                'status': 'in_progress'
-            }
-            supabase.table('progress').insert(new_progress).execute()
-            logger.info(f"✅ Created progress for topic {topic_id}")
-        else:
-            # Update status to in_progress
-            supabase.table('progress')\
-                .update({'status': 'in_progress', 'last_activity': datetime.utcnow().isoformat()})\
-                .eq('id', existing_progress.data[0]['id'])\
-                .execute()
-        
-        # Create chat session
-        session = supabase.table('chat_sessions').insert({
-            'user_id': user['user_id'],
-            'topic_id': topic_id,
-            'title': f"Learning {topic.data['title']}",
-            'metadata': {
-                'started_at': datetime.utcnow().isoformat(),
-                'topic_title': topic.data['title'],
-                'difficulty': topic.data['difficulty_level']
+        # Create or resume progress and open the chat session in one RPC
+        # (see sql/topic_catalog.sql). Lesson counters and score are left to
+        # column defaults so resuming never resets them.
+        now_iso = datetime.utcnow().isoformat()
+        session = await _sb_exec(supabase.rpc('start_topic_session', {
+            'p_user_id': user['user_id'],
+            'p_topic_id': topic_id,
+            'p_title': f"Learning {topic['title']}",
+            'p_started_at': now_iso,
+            'p_metadata': {
+                'started_at': now_iso,
+                'topic_title': topic['title'],
+                'difficulty': topic['difficulty_level']
             }
-        }).execute()
+        }))
+        logger.info(f"✅ Started progress for topic {topic_id}")
         
-        session_id = session.data[0]['id']
+        session_id = session.data
         
         # Get first lesson from content structure
-        content_structure = topic.data.get('content_structure', {})
+        content_structure = topic.get('content_structure', {})
         lessons = content_structure.get('lessons', [])
         next_lesson = lessons[0] if lessons else {
             'title': 'Introduction',
-            'description': f"Let's start learning {topic.data['title']}!",
+            'description': f"Let's start learning {topic['title']}!",
             'order': 1
         }
         
         return StartTopicResponse(
             topic_id=topic_id,
             session_id=session_id,
-            message=f"Started learning {topic.data['title']}! Let's begin.",
+            message=f"Started learning {topic['title']}! Let's begin.",
             next_lesson=next_lesson
         )
         
@@ -328,18 +347,19 @@ async def complete_topic(
     """
     Mark a topic as completed
     """
-    supabase = get_supabase_client()
+    supabase = await _get_client()
     
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
     try:
         # Get progress
-        progress = supabase.table('progress')\
-            .select('*')\
-            .eq('user_id', user['user_id'])\
-            .eq('topic_id', topic_id)\
-            .execute()
+        progress = await _sb_exec(
+            supabase.table('progress')
+            .select('id, completed_lessons, total_lessons, score')
+            .eq('user_id', user['user_id'])
+            .eq('topic_id', topic_id)
+        )
         
         if not progress.data:
             raise HTTPException(status_code=404, detail="No progress found for this topic")
@@ -357,11 +377,11 @@ async def complete_topic(
             )
         
         # Update to completed
-        supabase.table('progress').update({
+        await _sb_exec(supabase.table('progress').update({
             'status': 'completed',
             'completed_lessons': total,
             'last_activity': datetime.utcnow().isoformat()
-        }).eq('id', progress_data['id']).execute()
+        }).eq('id', progress_data['id']))
         
         logger.info(f"✅ Completed topic {topic_id} for user {user['user_id']}")
         
@@ -386,31 +406,28 @@ async def get_categories(
     """
     Get all available topic categories with counts
     """
-    supabase = get_supabase_client()
+    supabase = await _get_client()
     
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
+    global _categories_cache
+    if _categories_cache is not None and time.monotonic() - _categories_cache[0] < _CATEGORIES_CACHE_TTL:
+        return _categories_cache[1]
+    
     try:
-        # Get all topics
-        topics = supabase.table('topics')\
-            .select('category')\
-            .eq('is_active', True)\
-            .execute()
-        
-        # Count by category
-        category_counts = {}
-        for topic in topics.data:
-            cat = topic['category']
-            category_counts[cat] = category_counts.get(cat, 0) + 1
-        
-        # Format response
-        categories = [
-            {"name": cat, "count": count}
-            for cat, count in sorted(category_counts.items())
-        ]
+        # Counted server-side by the topic_category_counts view
+        # (see sql/topic_catalog.sql)
+        result = await _sb_exec(
+            supabase.table('topic_category_counts')
+            .select('name, count')
+            .order('name')
+        )
+        categories = result.data or []
         
-        return {"categories": categories}
+        payload = {"categories": categories}
+        _categories_cache = (time.monotonic(), payload)
+        return payload
         
     except Exception as e:
         logger.error(f"❌ Failed to get categories: {e}")
@@ -2,53 +2,66 @@
 Quick verification of what the migration will add to your database
 """
 
-print("=" * 80)
-print("MIGRATION STATUS CHECK")
-print("=" * 80)
-
-print("\n✅ ALREADY COMPLETED (columns exist):")
-print("   • chat_sessions.roadmap_id")
-print("   • chat_sessions.message_count")
-print("   • chat_sessions.ended_at")
-print("   • milestone_progress.auto_completed")
-print("   • milestone_progress.completion_confidence")
-print("   • milestone_progress.completion_evidence")
-print("   • milestone_progress.inference_metadata")
-
-print("\n📋 WHAT THE MIGRATION WILL ADD:")
-print("\n1. INDEXES (Performance improvements):")
-print("   • idx_chat_sessions_roadmap_id")
-print("   • idx_chat_messages_metadata_gin (for JSON queries)")
-print("   • idx_milestone_progress_auto_completed")
-print("   • idx_conversation_quizzes_session_id")
-
-print("\n2. CONSTRAINTS:")
-print("   • Updated chat_messages.message_type CHECK constraint")
-print("   • Includes: milestone_update, progress_event types")
-
-print("\n3. HELPER FUNCTIONS:")
-print("   • get_or_create_chat_session() - Unified session creation")
-print("   • update_session_message_count() - Auto-increment trigger")
-print("   • get_session_statistics() - Session analytics")
-
-print("\n4. VIEWS:")
-print("   • active_learning_sessions - Roadmap-linked chats")
-print("   • session_message_types - Message analytics")
-
-print("\n5. TRIGGERS:")
-print("   • update_session_message_count_trigger")
-
-print("\n6. DATA BACKFILL:")
-print("   • Set message_type for NULL values")
-print("   • Update message_count for existing sessions")
-
-print("\n7. conversation_quizzes ENHANCEMENT:")
-print("   • Add session_id column (if not exists)")
-
-print("\n" + "=" * 80)
-print("RECOMMENDATION:")
-print("=" * 80)
-print("Since columns already exist, the migration is SAFE to run.")
-print("It will add helpful functions, indexes, and views without data loss.")
-print("\nProceed with running the SQL in Supabase SQL Editor! ✅")
-print("=" * 80)
+import sys
+
+_RULE = "=" * 80
+
+REPORT = f"""\
+{_RULE}
+MIGRATION STATUS CHECK
+{_RULE}
+
+✅ ALREADY COMPLETED (columns exist):
+   • chat_sessions.roadmap_id
+   • chat_sessions.message_count
+   • chat_sessions.ended_at
+   • milestone_progress.auto_completed
+   • milestone_progress.completion_confidence
+   • milestone_progress.completion_evidence
+   • milestone_progress.inference_metadata
+
+📋 WHAT THE MIGRATION WILL ADD:
+
+1. INDEXES (Performance improvements):
+   • idx_chat_sessions_roadmap_id
+   • idx_chat_messages_metadata_gin (for JSON queries)
+   • idx_milestone_progress_auto_completed
+   • idx_conversation_quizzes_session_id
+
+2. CONSTRAINTS:
+   • Updated chat_messages.message_type CHECK constraint
+   • Includes: milestone_update, progress_event types
+
+3. HELPER FUNCTIONS:
+   • get_or_create_chat_session() - Unified session creation
+   • update_session_message_count() - Auto-increment trigger
+   • get_session_statistics() - Session analytics
+
+4. VIEWS:
+   • active_learning_sessions - Roadmap-linked chats
+   • session_message_types - Message analytics
+
+5. TRIGGERS:
+   • update_session_message_count_trigger
+
+6. DATA BACKFILL:
+   • Set message_type for NULL values
+   • Update message_count for existing sessions
+
+7. conversation_quizzes ENHANCEMENT:
+   • Add session_id column (if not exists)
+
+{_RULE}
+RECOMMENDATION:
+{_RULE}
+Since columns already exist, the migration is SAFE to run.
+It will add helpful functions, indexes, and views without data loss.
+
+Proceed with running the SQL in Supabase SQL Editor! ✅
+{_RULE}
+"""
+
+
+if __name__ == "__main__":
+    sys.stdout.write(REPORT)
+    sys.stdout.flush()
@@ -1,16 +1,29 @@
-# Advanced web crawler using Crawlee for clean data extraction
-# pip install ddgs crawlee
+# Advanced web crawler using Playwright for clean data extraction
+# pip install ddgs playwright httpx lxml
 
 import asyncio
+import hashlib
 import time
 import json
 import re
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Iterable, Optional, Any
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlparse
 
+import httpx
+import lxml.html
 from ddgs import DDGS
-from crawlee.crawlers import PlaywrightCrawler
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+try:
+    import orjson  # optional: faster serialization of crawl results
+except ImportError:
+    orjson = None
+try:
+    import xxhash  # optional: faster content hashing for duplicate detection
+except ImportError:
+    xxhash = None
 
 # --- Configuration ---
 DEFAULT_HEADERS = {
@@ -22,8 +35,284 @@ DEFAULT_HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
 }
 
+# Code block detection in split_content_by_headings: a paragraph is code if it
+# contains a marker, or spans several lines and mentions a hint (any case)
+_CODE_MARKER_RE = re.compile(r'def |import ')
+_CODE_HINT_RE = re.compile(r'python|print\(|return |if ', re.IGNORECASE)
+
+# Static pages whose best extraction reaches this many characters skip the browser
+STATIC_MIN_CHARS = 500
+STATIC_TIMEOUT = 15.0
+# Pages rendered at once in the shared browser context
+BROWSER_CONCURRENCY = 4
+# Chromium profile kept between runs so its disk cache survives the process
+BROWSER_PROFILE_DIR = Path.home() / ".porte_hobe" / "pw_profile"
+BROWSER_DISK_CACHE_BYTES = 500_000_000
+# Longest wait for a rendered page to show content after DOMContentLoaded
+CONTENT_WAIT_MS = 5000
+# Only text is extracted, so the browser never needs to download these
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+# Search results are cached on disk per (query, max_results) for this long
+SEARCH_CACHE_DIR = Path(".ddg_cache")
+SEARCH_CACHE_TTL = 24 * 60 * 60
+
+# Article container selectors for sites that show up often in search results.
+# When a rendered page's host matches, only that element is extracted.
+ARTICLE_CONTAINER_HINTS = {
+    "en.wikipedia.org": "#mw-content-text",
+    "stackoverflow.com": "#mainbar",
+    "docs.python.org": "div.body",
+    "dev.to": "#article-body",
+    "medium.com": "article",
+}
+
+# XPath equivalents of the in-browser extraction selectors, so static HTML can be
+# processed without Chromium
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_MAIN_XPATHS = [
+    "//main", "//article", "//*[@role='main']",
+    f"//*[{_has_class('content')}]", "//*[@id='content']",
+    f"//*[{_has_class('main-content')}]", "//*[@id='main-content']",
+    f"//*[{_has_class('post-content')}]", f"//*[{_has_class('entry-content')}]",
+    f"//*[{_has_class('article-content')}]", f"//*[{_has_class('story-body')}]",
+    f"//*[{_has_class('article-body')}]", f"//*[{_has_class('post-body')}]",
+]
+_NOISE_XPATH = " | ".join([
+    ".//nav", ".//header", ".//footer", ".//aside", ".//form",
+    f".//*[{_has_class('sidebar')}]", f".//*[{_has_class('navigation')}]",
+    f".//*[{_has_class('menu')}]", f".//*[{_has_class('nav')}]",
+    f".//*[{_has_class('ad')}]", f".//*[{_has_class('advertisement')}]",
+    f".//*[{_has_class('ads')}]", ".//*[contains(@class, 'ad-')]",
+    f".//*[{_has_class('social')}]", f".//*[{_has_class('share')}]",
+    f".//*[{_has_class('comment')}]", f".//*[{_has_class('popup')}]",
+    f".//*[{_has_class('modal')}]",
+    ".//script", ".//style", ".//noscript", ".//svg",
+    f".//*[{_has_class('cookie')}]", f".//*[{_has_class('newsletter')}]",
+    f".//*[{_has_class('subscription')}]",
+])
+
+
+def content_hash(text: str) -> int:
+    """64-bit hash of text with case and whitespace normalized away."""
+    normalized = "".join(text.lower().split()).encode()
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(normalized)
+    return int.from_bytes(hashlib.blake2b(normalized, digest_size=8).digest(), "big")
+
+
+def _text(element) -> str:
+    return " ".join(t.strip() for t in element.itertext() if t.strip())
+
+
+def extract_static(html: str, base_url: str) -> Dict[str, Any]:
+    """Run the crawler's extraction strategies over server-rendered HTML.
+
+    Like the in-browser extraction, only the longest strategy's text is
+    returned.
+    """
+    doc = lxml.html.fromstring(html)
+    doc.make_links_absolute(base_url, resolve_base_href=True)
+    for junk in doc.xpath("//script | //style | //noscript"):
+        junk.drop_tree()
+    body = doc.find("body")
+    if body is None:
+        body = doc
+
+    # Keep only the longest strategy so far rather than every candidate text
+    best_strategy, best_content = "none", ""
+
+    def consider(strategy: str, content: str):
+        nonlocal best_strategy, best_content
+        if len(content) > len(best_content):
+            best_strategy, best_content = strategy, content
+
+    for xpath in _MAIN_XPATHS:
+        found = doc.xpath(xpath)
+        if found:
+            text = _text(found[0])
+            if len(text) > 100:
+                consider("main_content", text)
+                break
+
+    paragraphs = (_text(p) for p in doc.iter("p"))
+    consider("paragraphs", "\n\n".join(t for t in paragraphs if len(t) > 20))
+
+    body_text = _text(body)
+    for noise in body.xpath(_NOISE_XPATH):
+        if noise.getparent() is not None:
+            noise.drop_tree()
+    consider("body_filtered", _text(body))
+    consider("simple_text", body_text)
+
+    meta = doc.xpath("//meta[@name='description']/@content | //meta[@property='og:description']/@content")
+
+    headings = []
+    for h in doc.iter("h1", "h2", "h3", "h4", "h5", "h6"):
+        text = _text(h)
+        if 2 < len(text) < 200:
+            headings.append({"level": h.tag, "text": text})
+            if len(headings) == 10:
+                break
+
+    links = {}
+    for a in doc.iter("a"):
+        href = a.get("href", "")
+        text = _text(a)
+        if 3 < len(text) < 100 and href.startswith("http") and "#" not in href and href not in links:
+            links[href] = {"text": text, "url": href}
+            if len(links) == 8:
+                break
+
+    return {
+        "title": (doc.findtext(".//title") or "").strip(),
+        "strategy": best_strategy,
+        "content": best_content,
+        "meta_description": meta[0] if meta else "",
+        "headings": headings,
+        "links": list(links.values()),
+    }
+
+
+# Extraction run inside the page: the four content strategies (or just the
+# site's known article container) plus metadata, headings and links, returned
+# in one object
+_EXTRACT_JS = """(containerSelector) => {
+    const textOf = el => (el && el.innerText ? el.innerText.trim() : '');
+    const strategies = [];
+
+    // Known article container for this site: use it alone and skip the
+    // whole-body strategies
+    const hinted = containerSelector ? textOf(document.querySelector(containerSelector)) : '';
+    if (hinted.length > 100) {
+        strategies.push(['hinted', hinted]);
+    } else {
+        strategies.push(...extractStrategies());
+    }
+
+    function extractStrategies() {
+        const strategies = [];
+
+        // Strategy 1: main content selectors
+        const mainSelectors = [
+            'main', 'article', '[role="main"]',
+            '.content', '#content', '.main-content', '#main-content',
+            '.post-content', '.entry-content', '.article-content',
+            '.story-body', '.article-body', '.post-body'
+        ];
+        let mainContent = '';
+        for (const selector of mainSelectors) {
+            const text = textOf(document.querySelector(selector));
+            if (text.length > 100) {
+                mainContent = text;
+                break;
+            }
+        }
+        strategies.push(['main_content', mainContent]);
+
+        // Strategy 2: all paragraphs
+        strategies.push(['paragraphs', Array.from(document.querySelectorAll('p'))
+            .map(textOf)
+            .filter(text => text.length > 20)
+            .join('\\n\\n')]);
+
+        // Strategy 3: body content with noise removed from a clone
+        const bodyClone = document.body.cloneNode(true);
+        const noiseSelectors = [
+            'nav', 'header', 'footer', 'aside', 'form',
+            '.sidebar', '.navigation', '.menu', '.nav',
+            '.ad', '.advertisement', '.ads', '[class*="ad-"]',
+            '.social', '.share', '.comment', '.popup', '.modal',
+            'script', 'style', 'noscript', 'svg',
+            '.cookie', '.newsletter', '.subscription'
+        ];
+        bodyClone.querySelectorAll(noiseSelectors.join(',')).forEach(el => el.remove());
+        strategies.push(['body_filtered', textOf(bodyClone)]);
+
+        // Strategy 4: simple fallback - all text
+        strategies.push(['simple_text', document.body.innerText || document.body.textContent || '']);
+        return strategies;
+    }
+
+    // Choose the longest
+    let strategy = 'none';
+    let content = '';
+    for (const [name, text] of strategies) {
+        if (text && text.length > content.length) {
+            strategy = name;
+            content = text;
+        }
+    }
+
+    const desc = document.querySelector('meta[name="description"]') ||
+                 document.querySelector('meta[property="og:description"]');
+
+    const headings = [];
+    document.querySelectorAll('h1, h2, h3, h4, h5, h6').forEach(h => {
+        const text = textOf(h);
+        if (text.length > 2 && text.length < 200) {
+            headings.push({ level: h.tagName.toLowerCase(), text });
+        }
+    });
+
+    // First link per URL, in document order
+    const uniqueLinks = new Map();
+    document.querySelectorAll('a[href]').forEach(a => {
+        const href = a.href;
+        if (uniqueLinks.has(href)) return;
+        const text = textOf(a);
+        if (text.length > 3 && text.length < 100 &&
+            href && href.startsWith('http') && !href.includes('#')) {
+            uniqueLinks.set(href, { text, url: href });
+        }
+    });
+
+    return {
+        title: document.title,
+        strategy,
+        content,
+        meta: desc ? desc.content : '',
+        headings: headings.slice(0, 10),
+        links: [...uniqueLinks.values()].slice(0, 8)
+    };
+}"""
+
+
+# Ready once the main content area (or any paragraph) holds some text
+_CONTENT_READY_JS = """() => {
+    const el = document.querySelector('main, article, p');
+    return (el && el.innerText ? el.innerText.length : 0) > 200;
+}"""
+
+
+async def _block_heavy_resources(route):
+    """Playwright route handler that aborts requests for non-text resources."""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def _search_cache_path(query: str, max_results: int) -> Path:
+    key = hashlib.blake2s(f"{max_results}:{query}".encode()).hexdigest()
+    return SEARCH_CACHE_DIR / f"{key}.json"
+
+
 def search_duckduckgo(query: str, max_results: int = 5) -> List[Dict[str, str]]:
-    """Search DuckDuckGo and return results."""
+    """Search DuckDuckGo and return results.
+
+    Non-empty results are cached in SEARCH_CACHE_DIR for SEARCH_CACHE_TTL
+    seconds, so repeating a query skips the network and DDGS rate limits.
+    """
+    cache_path = _search_cache_path(query, max_results)
+    try:
+        if time.time() - cache_path.stat().st_mtime < SEARCH_CACHE_TTL:
+            return json.loads(cache_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        pass
+
     results = []
     try:
         with DDGS() as ddgs:
@@ -35,199 +324,58 @@ def search_duckduckgo(query: str, max_results: int = 5) -> List[Dict[str, str]]:
                 })
     except Exception as e:
         print(f"[ERROR] Search failed: {e}")
+        return results
+
+    if results:
+        try:
+            SEARCH_CACHE_DIR.mkdir(exist_ok=True)
+            cache_path.write_text(json.dumps(results, ensure_ascii=False), encoding='utf-8')
+        except OSError as e:
+            print(f"[WARN] Could not cache search results: {e}")
     return results
 
 class WebCrawler:
-    """Enhanced web crawler using Crawlee for clean data extraction."""
+    """Enhanced web crawler using Playwright for clean data extraction."""
     
-    def __init__(self):
+    def __init__(self, container_hints: Optional[Dict[str, str]] = None):
         self.crawled_data = []
+        # host -> CSS selector of the article container on that site
+        self.container_hints = ARTICLE_CONTAINER_HINTS if container_hints is None else container_hints
+        # content_hash -> first URL seen with that content in the current crawl
+        self._seen_hashes: Dict[int, str] = {}
+        # Shared "extracted_at" of every page in the current crawl
+        self._extracted_at = datetime.now().isoformat()
         
-    async def crawl_handler(self, context):
-        """Handler for each crawled page - extracts clean data."""
-        request = context.request
-        page = context.page
-        
+    async def crawl_handler(self, page, url: str):
+        """Load a URL in a browser page and extract clean data."""
         try:
             # Wait for page to load completely
-            await page.wait_for_load_state('domcontentloaded', timeout=15000)
-            
-            # Additional wait for dynamic content
-            await page.wait_for_timeout(2000)
-            
-            # Extract title
-            title = await page.title()
-            
-            # Get page content using multiple extraction strategies
-            content_strategies = []
+            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
             
-            # Strategy 1: Try main content selectors
+            # Wait for dynamic content only as long as it takes to appear;
+            # pages that never get there are extracted as they stand
             try:
-                main_content_1 = await page.evaluate("""() => {
-                    const mainSelectors = [
-                        'main', 'article', '[role="main"]', 
-                        '.content', '#content', '.main-content', '#main-content',
-                        '.post-content', '.entry-content', '.article-content', 
-                        '.story-body', '.article-body', '.post-body'
-                    ];
-                    
-                    for (const selector of mainSelectors) {
-                        const element = document.querySelector(selector);
-                        if (element && element.innerText && element.innerText.length > 100) {
-                            return element.innerText.trim();
-                        }
-                    }
-                    return '';
-                }""")
-                content_strategies.append(("main_content", main_content_1))
-            except Exception as e:
-                print(f"Strategy 1 failed: {e}")
+                await page.wait_for_function(_CONTENT_READY_JS, timeout=CONTENT_WAIT_MS)
+            except PlaywrightTimeoutError:
+                pass
             
-            # Strategy 2: Get all paragraphs
-            try:
-                paragraph_content = await page.evaluate("""() => {
-                    const paragraphs = Array.from(document.querySelectorAll('p'));
-                    const text = paragraphs
-                        .map(p => p.innerText ? p.innerText.trim() : '')
-                        .filter(text => text.length > 20)
-                        .join('\\n\\n');
-                    return text;
-                }""")
-                content_strategies.append(("paragraphs", paragraph_content))
-            except Exception as e:
-                print(f"Strategy 2 failed: {e}")
-            
-            # Strategy 3: Body content with noise removal
-            try:
-                body_content = await page.evaluate("""() => {
-                    // Clone body to avoid modifying original
-                    const bodyClone = document.body.cloneNode(true);
-                    
-                    // Remove noise elements
-                    const noiseSelectors = [
-                        'nav', 'header', 'footer', 'aside', 'form',
-                        '.sidebar', '.navigation', '.menu', '.nav',
-                        '.ad', '.advertisement', '.ads', '[class*="ad-"]',
-                        '.social', '.share', '.comment', '.popup', '.modal',
-                        'script', 'style', 'noscript', 'svg',
-                        '.cookie', '.newsletter', '.subscription'
-                    ];
-                    
-                    noiseSelectors.forEach(selector => {
-                        const elements = bodyClone.querySelectorAll(selector);
-                        elements.forEach(el => el.remove());
-                    });
-                    
-                    return bodyClone.innerText ? bodyClone.innerText.trim() : '';
-                }""")
-                content_strategies.append(("body_filtered", body_content))
-            except Exception as e:
-                print(f"Strategy 3 failed: {e}")
-            
-            # Strategy 4: Simple fallback - just get all text
-            try:
-                simple_content = await page.evaluate("""() => {
-                    return document.body.innerText || document.body.textContent || '';
-                }""")
-                content_strategies.append(("simple_text", simple_content))
-            except Exception as e:
-                print(f"Strategy 4 failed: {e}")
-            
-            # Choose the best content (longest meaningful text)
-            main_content = ""
-            best_strategy = "none"
-            for strategy_name, content in content_strategies:
-                if content and len(content) > len(main_content):
-                    main_content = content
-                    best_strategy = strategy_name
-            
-            # Clean up the selected content
-            if main_content:
-                # Remove excessive whitespace
-                main_content = re.sub(r'\s+', ' ', main_content)
-                main_content = re.sub(r'\n\s*\n', '\n\n', main_content)
-                main_content = main_content.strip()
-            
-            # Extract metadata
-            try:
-                meta_description = await page.evaluate("""() => {
-                    const desc = document.querySelector('meta[name="description"]') || 
-                               document.querySelector('meta[property="og:description"]');
-                    return desc ? desc.content : '';
-                }""")
-            except Exception:
-                meta_description = ""
-            
-            # Extract headings structure (more robust)
-            try:
-                headings = await page.evaluate("""() => {
-                    const headings = [];
-                    const headingElements = document.querySelectorAll('h1, h2, h3, h4, h5, h6');
-                    headingElements.forEach(h => {
-                        const text = h.innerText ? h.innerText.trim() : '';
-                        if (text && text.length > 2 && text.length < 200) {
-                            headings.push({
-                                level: h.tagName.toLowerCase(),
-                                text: text
-                            });
-                        }
-                    });
-                    return headings.slice(0, 10); // Limit to first 10 headings
-                }""")
-            except Exception:
-                headings = []
-            
-            # Extract meaningful links
-            try:
-                links = await page.evaluate("""() => {
-                    const links = [];
-                    const linkElements = document.querySelectorAll('a[href]');
-                    linkElements.forEach(a => {
-                        const href = a.href;
-                        const text = a.innerText ? a.innerText.trim() : '';
-                        if (text && text.length > 3 && text.length < 100 && 
-                            href && href.startsWith('http') && !href.includes('#')) {
-                            links.push({ text, url: href });
-                        }
-                    });
-                    // Remove duplicates and limit
-                    const uniqueLinks = links.filter((link, index, self) => 
-                        self.findIndex(l => l.url === link.url) === index
-                    );
-                    return uniqueLinks.slice(0, 8);
-                }""")
-            except Exception:
-                links = []
-            
-            # Convert to Markdown format
-            markdown_content = self.convert_to_markdown(
-                title, main_content, headings, links, meta_description
+            # Run every extraction strategy in a single round-trip. The longest
+            # strategy is chosen in the browser so only its text crosses CDP.
+            extracted = await page.evaluate(_EXTRACT_JS, self.container_hint(url))
+            title = extracted["title"]
+            page_data = self.build_page_data(
+                url, title, extracted["strategy"], extracted["content"],
+                extracted["meta"], extracted["headings"], extracted["links"]
             )
-            
-            # Store extracted data
-            page_data = {
-                "title": title or "",
-                "url": request.url,
-                "meta_description": meta_description,
-                "content": main_content,  # Keep original for compatibility
-                "markdown": markdown_content,  # New markdown version
-                "headings": headings,
-                "links": links,
-                "word_count": len(main_content.split()) if main_content else 0,
-                "extraction_strategy": best_strategy,
-                "content_length": len(main_content),
-                "extracted_at": datetime.now().isoformat()
-            }
-            
             self.crawled_data.append(page_data)
-            print(f"✓ Extracted {len(main_content)} chars using '{best_strategy}' from: {title[:60]}...")
+            print(f"✓ Extracted {page_data['content_length']} chars using '{page_data['extraction_strategy']}' from: {title[:60]}...")
             
         except Exception as e:
-            print(f"[ERROR] Failed to extract from {request.url}: {e}")
+            print(f"[ERROR] Failed to extract from {url}: {e}")
             # Store minimal data for failed extractions
             self.crawled_data.append({
                 "title": await page.title() if page else "",
-                "url": request.url,
+                "url": url,
                 "meta_description": "",
                 "content": "",
                 "headings": [],
@@ -235,10 +383,100 @@ class WebCrawler:
                 "word_count": 0,
                 "content_length": 0,
                 "extraction_strategy": "failed",
-                "extracted_at": datetime.now().isoformat(),
+                "extracted_at": self._extracted_at,
                 "error": str(e)
             })
 
+    def container_hint(self, url: str) -> Optional[str]:
+        """Article container selector for the URL's host, if one is known."""
+        host = urlparse(url).netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return self.container_hints.get(host)
+
+    def build_page_data(self, url: str, title: str, best_strategy: str, main_content: str,
+                        meta_description: str, headings: list, links: list,
+                        min_chars: int = 0) -> Optional[Dict[str, Any]]:
+        """Clean the chosen extraction and assemble the stored page record.
+
+        Returns None if the content is shorter than min_chars. Pages whose
+        content exactly duplicates an earlier page in this crawl carry a
+        "duplicate_of" URL. Markdown is filled in later by markdownify_batch.
+        """
+        # Clean up the selected content
+        if main_content:
+            # Collapse all whitespace runs (newlines included) to single spaces;
+            # str.split scans in C, much faster than a regex on large pages
+            main_content = ' '.join(main_content.split())
+        
+        if len(main_content) < min_chars:
+            return None
+        
+        page_data = {
+            "title": title or "",
+            "url": url,
+            "meta_description": meta_description,
+            "content": main_content,  # Keep original for compatibility
+            "markdown": "",
+            "headings": headings,
+            "links": links,
+            # Whitespace is already single spaces, so count separators
+            "word_count": main_content.count(' ') + 1 if main_content else 0,
+            "extraction_strategy": best_strategy,
+            "content_length": len(main_content),
+            "extracted_at": self._extracted_at
+        }
+        
+        if main_content:
+            digest = content_hash(main_content)
+            original = self._seen_hashes.setdefault(digest, url)
+            if original != url:
+                page_data["duplicate_of"] = original
+        
+        return page_data
+
+    def markdownify_batch(self, pages: List[Dict[str, Any]]):
+        """Fill in the Markdown version of each page that is not a duplicate."""
+        for page in pages:
+            if "duplicate_of" not in page and "error" not in page:
+                page["markdown"] = self.convert_to_markdown(
+                    page["title"], page["content"], page["headings"],
+                    page["links"], page["meta_description"]
+                )
+
+    async def fetch_static(self, client: httpx.AsyncClient, url: str) -> Optional[Dict[str, Any]]:
+        """Fetch a page over plain HTTP and extract it without a browser.
+
+        Returns None when the page is not HTML, the request fails, or the
+        static extraction is too thin (likely rendered by JavaScript).
+        """
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return None
+        if "text/html" not in response.headers.get("content-type", ""):
+            return None
+
+        try:
+            extracted = await asyncio.to_thread(extract_static, response.text, str(response.url))
+        except Exception:
+            return None
+        page_data = self.build_page_data(
+            url,
+            extracted["title"],
+            f"static_{extracted['strategy']}",
+            extracted["content"],
+            extracted["meta_description"],
+            extracted["headings"],
+            extracted["links"],
+            min_chars=STATIC_MIN_CHARS,
+        )
+        if page_data is None:
+            return None
+        print(f"✓ Extracted {page_data['content_length']} chars over HTTP from: {page_data['title'][:60]}...")
+        return page_data
+
     def convert_to_markdown(self, title: str, content: str, headings: list, links: list, meta_description: str) -> str:
         """Convert extracted content to well-formatted Markdown."""
         markdown_lines = []
@@ -287,22 +525,32 @@ class WebCrawler:
     def split_content_by_headings(self, content: str, headings: list) -> list:
         """Split content into sections based on headings."""
         sections = []
-        content_lower = content.lower()
         
-        # Sort headings by their position in content
-        heading_positions = []
+        # Locate the first occurrence of every heading in one case-insensitive
+        # scan; longer headings are tried first so a heading that prefixes
+        # another cannot shadow it
+        levels = {}
         for heading in headings:
             heading_text = heading.get('text', '').strip()
             if heading_text:
-                pos = content_lower.find(heading_text.lower())
-                if pos != -1:
+                levels.setdefault(heading_text.lower(), (heading_text, heading.get('level', 'h2')))
+        
+        heading_positions = []
+        if levels:
+            pattern = re.compile(
+                "|".join(re.escape(text) for text, _ in sorted(levels.values(), key=lambda h: -len(h[0]))),
+                re.IGNORECASE,
+            )
+            for match in pattern.finditer(content):
+                found = levels.pop(match.group().lower(), None)
+                if found is not None:
                     heading_positions.append({
-                        'pos': pos,
-                        'text': heading_text,
-                        'level': heading.get('level', 'h2')
+                        'pos': match.start(),
+                        'text': found[0],
+                        'level': found[1]
                     })
-        
-        heading_positions.sort(key=lambda x: x['pos'])
+                    if not levels:
+                        break
         
         # Extract content sections
         for i, heading in enumerate(heading_positions):
@@ -332,8 +580,8 @@ class WebCrawler:
                     para = para.strip()
                     if para and len(para) > 20:  # Filter short lines
                         # Handle code blocks (simple detection)
-                        if ('def ' in para or 'import ' in para or 
-                            para.count('\n') > 2 and any(keyword in para.lower() for keyword in ['python', 'print(', 'return ', 'if '])):
+                        if (_CODE_MARKER_RE.search(para) or
+                            para.count('\n') > 2 and _CODE_HINT_RE.search(para)):
                             section_lines.append("```python")
                             section_lines.append(para)
                             section_lines.append("```")
@@ -345,24 +593,67 @@ class WebCrawler:
         
         return sections
 
+    async def render_urls(self, urls: List[str]):
+        """Render URLs in one shared, persistent browser context.
+
+        Pages opened from the same context share its HTTP cache and cookies,
+        so assets common to several results are fetched once per crawl. The
+        profile lives in BROWSER_PROFILE_DIR, so the disk cache also carries
+        over to later runs that revisit the same sites.
+        """
+        BROWSER_PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        async with async_playwright() as p:
+            context = await p.chromium.launch_persistent_context(
+                user_data_dir=str(BROWSER_PROFILE_DIR),
+                headless=True,
+                args=[f"--disk-cache-size={BROWSER_DISK_CACHE_BYTES}"],
+                user_agent=DEFAULT_HEADERS["User-Agent"],
+                extra_http_headers={"Accept-Language": DEFAULT_HEADERS["Accept-Language"]},
+            )
+            await context.route("**/*", _block_heavy_resources)
+            semaphore = asyncio.Semaphore(BROWSER_CONCURRENCY)
+            
+            async def render(url: str):
+                async with semaphore:
+                    page = await context.new_page()
+                    try:
+                        await self.crawl_handler(page, url)
+                    finally:
+                        await page.close()
+            
+            try:
+                # One failing page must not abort the others
+                await asyncio.gather(*(render(url) for url in urls), return_exceptions=True)
+            finally:
+                await context.close()
+
     async def crawl_urls(self, urls: List[str]) -> List[Dict[str, Any]]:
-        """Crawl multiple URLs using Crawlee."""
+        """Crawl multiple URLs, over plain HTTP where possible and Playwright otherwise."""
         self.crawled_data = []  # Reset data
+        self._seen_hashes = {}
+        # One timestamp per crawl: second-level precision is all extracted_at
+        # needs, so pages don't each read the clock and format it
+        self._extracted_at = datetime.now().isoformat()
         
-        # Create crawler with optimized settings
-        crawler = PlaywrightCrawler(
-            max_requests_per_crawl=len(urls),
-            request_handler=self.crawl_handler,
-            headless=True,
-            browser_type='chromium',
-        )
+        # Fast path: static HTML needs no browser
+        async with httpx.AsyncClient(
+            headers=DEFAULT_HEADERS, follow_redirects=True, timeout=STATIC_TIMEOUT
+        ) as client:
+            static_pages = await asyncio.gather(*(self.fetch_static(client, url) for url in urls))
+        pages = {url: page for url, page in zip(urls, static_pages) if page is not None}
+        browser_urls = [url for url in urls if url not in pages]
         
-        # Add URLs to crawl
-        await crawler.add_requests(urls)
+        if browser_urls:
+            await self.render_urls(browser_urls)
+            for page in self.crawled_data:
+                pages.setdefault(page["url"], page)
         
-        # Run the crawler
-        await crawler.run()
+        # Keep results in input order so they line up with search results
+        self.crawled_data = [pages[url] for url in urls if url in pages]
         
+        # Markdown conversion is pure CPU string work; run it once for the
+        # whole batch off the event loop instead of inside each page handler
+        await asyncio.to_thread(self.markdownify_batch, self.crawled_data)
         return self.crawled_data
 
 def save_to_json(data: List[Dict], filename: Optional[str] = None) -> str:
@@ -372,8 +663,31 @@ def save_to_json(data: List[Dict], filename: Optional[str] = None) -> str:
         filename = f"crawl_results_{timestamp}.json"
     
     filepath = Path(filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        filepath.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    
+    return str(filepath)
+
+def save_to_jsonl(records: Iterable[Dict], filename: Optional[str] = None) -> str:
+    """Append records to a JSON Lines file, one page per line.
+
+    Records are written as they are consumed, so a generator is never
+    materialized and an interrupted run keeps every page written so far.
+    """
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"crawl_results_{timestamp}.jsonl"
+    
+    filepath = Path(filename)
+    with open(filepath, 'ab') as f:
+        for record in records:
+            if orjson is not None:
+                f.write(orjson.dumps(record) + b"\n")
+            else:
+                f.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
     
     return str(filepath)
 
@@ -406,8 +720,13 @@ def save_to_markdown(data: List[Dict], filename: Optional[str] = None) -> str:
     
     return str(filepath)
 
-async def search_and_crawl(query: str, max_results: int = 3) -> List[Dict[str, Any]]:
-    """Search DuckDuckGo and crawl results with clean extraction."""
+async def search_and_crawl(query: str, max_results: int = 3,
+                           container_hints: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Search DuckDuckGo and crawl results with clean extraction.
+
+    container_hints maps hosts to article container selectors; defaults to
+    ARTICLE_CONTAINER_HINTS.
+    """
     print(f"🔍 Searching for: {query}")
     search_results = search_duckduckgo(query, max_results)
     
@@ -424,8 +743,8 @@ async def search_and_crawl(query: str, max_results: int = 3) -> List[Dict[str, A
         print("❌ No valid URLs to crawl")
         return []
     
-    # Crawl with Crawlee
-    crawler = WebCrawler()
+    # Crawl (HTTP first, Playwright fallback)
+    crawler = WebCrawler(container_hints)
     crawled_data = await crawler.crawl_urls(urls)
     
     # Merge search snippets with crawled data
@@ -447,8 +766,8 @@ async def main():
         results = await search_and_crawl(query, max_results=3)
         
         if results:
-            # Save to JSON
-            json_file = save_to_json(results)
+            # Save to JSON Lines
+            json_file = save_to_jsonl(results)
             print(f"\n💾 Results saved to: {json_file}")
             
             # Save to Markdown